@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+打包脚本共用的小工具（build_parquet_viewer.py / build_slim.py）
+"""
+
+import io
+import os
+import hashlib
+import sys
+import functools
+import shutil
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+from textwrap import dedent
+
+
+@functools.lru_cache(maxsize=1)
+def qt6_root() -> Path:
+    """PyQt6 自带的 Qt6 目录（.../site-packages/PyQt6/Qt6），只解析一次。"""
+    import inspect
+    import PyQt6
+    return Path(inspect.getfile(PyQt6)).parent / "Qt6"
+
+
+def data_args(pairs, flag: str = "--add-data") -> list:
+    """
+    把 (src, dest) 列表转成 PyInstaller 参数：
+    - 分隔符用 os.pathsep（Windows 为 ";"，macOS/Linux 为 ":"）
+    - 源路径经 pathlib 规范化；不存在的（通配项无匹配的）直接跳过
+    - 重复项只保留一条
+    """
+    args, seen = [], set()
+    for src, dest in pairs:
+        src = Path(src)
+        if any(ch in src.name for ch in "*?["):
+            if not any(src.parent.glob(src.name)):
+                continue
+        elif not src.exists():
+            continue
+        key = (str(src), Path(dest).as_posix())
+        if key in seen:
+            continue
+        seen.add(key)
+        args += [flag, f"{key[0]}{os.pathsep}{key[1]}"]
+    return args
+
+
+_BINARY_EXTS = {".dll", ".pyd", ".so", ".dylib"}
+
+
+def _scan_dir(path: str):
+    """单层 scandir：返回 (文件列表, 子目录列表)，跳过 __pycache__。"""
+    files, dirs = [], []
+    with os.scandir(path) as it:
+        for e in it:
+            if e.is_dir(follow_symlinks=False):
+                if e.name != "__pycache__":
+                    dirs.append(e.path)
+            elif e.is_file():
+                files.append(e.path)
+    return files, dirs
+
+
+def collect_package_files(mod: str):
+    """
+    不导入包，按目录层级并行 scandir 预先解析包内资源：
+    - 返回 (datas, binaries)，元素为 (src, dest)，可直接转成 --add-data / --add-binary
+    - 同目录同扩展名的数据文件合并成一条通配项（dir/*.ext），减少参数数量
+    - .py/.pyc 交给 PyInstaller 的模块分析处理，不在此收集
+    """
+    spec = find_spec(mod)
+    if spec is None or not spec.submodule_search_locations:
+        return [], []
+    root = Path(next(iter(spec.submodule_search_locations)))
+    base = root.parent
+
+    files, pending = [], [str(root)]
+    with ThreadPoolExecutor() as ex:
+        while pending:
+            nxt = []
+            for fs, ds in ex.map(_scan_dir, pending):
+                files += fs
+                nxt += ds
+            pending = nxt
+
+    datas, binaries = set(), set()
+    for f in files:
+        p = Path(f)
+        ext = p.suffix.lower()
+        if ext in (".py", ".pyc"):
+            continue
+        dest = p.parent.relative_to(base).as_posix()
+        if ext in _BINARY_EXTS or ".so." in p.name:
+            binaries.add((str(p), dest))
+        elif ext:
+            datas.add((str(p.parent / f"*{p.suffix}"), dest))
+        else:
+            datas.add((str(p), dest))
+    return sorted(datas), sorted(binaries)
+
+
+# UPX 压缩后加载会出问题或解压开销很大的 DLL：保持原样
+UPX_EXCLUDES = (
+    "vcruntime140.dll", "vcruntime140_1.dll", "msvcp140.dll",
+    "Qt6Core.dll", "Qt6Gui.dll", "Qt6Widgets.dll",
+    "python3.dll", f"python{sys.version_info.major}{sys.version_info.minor}.dll",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def upx_root(upx_dir: str = ""):
+    """返回 upx 所在目录：优先配置的 UPX_DIR，其次 PATH；都找不到返回 None。只探测一次。"""
+    if upx_dir and Path(upx_dir).exists():
+        return Path(upx_dir)
+    found = shutil.which("upx")
+    return Path(found).parent if found else None
+
+
+def upx_args(use_upx: bool, upx_dir: str = "") -> list:
+    """生成 UPX 相关的 PyInstaller 参数；未启用或找不到 upx 时显式 --noupx。"""
+    root = upx_root(upx_dir) if use_upx else None
+    if root is None:
+        return ["--noupx"]
+    args = ["--upx-dir", str(root)]
+    for name in UPX_EXCLUDES:
+        args += ["--upx-exclude", name]
+    return args
+
+
+def is_stale(dst, *srcs) -> bool:
+    """dst 不存在，或任一存在的 src 比 dst 新时返回 True。"""
+    dst = Path(dst)
+    if not dst.exists():
+        return True
+    mtime = dst.stat().st_mtime
+    return any(Path(s).exists() and Path(s).stat().st_mtime > mtime for s in srcs)
+
+
+BUILD_STAMP = Path("dist") / ".build_fingerprint"
+
+
+def build_fingerprint(files, args) -> str:
+    """对输入文件内容 + PyInstaller 参数做 SHA256，作为“是否需要重新打包”的依据。"""
+    h = hashlib.sha256()
+    for f in files:
+        p = Path(f)
+        h.update(str(p).encode("utf-8"))
+        if p.exists():
+            h.update(p.read_bytes())
+    h.update(repr(list(args)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_up_to_date(fingerprint: str, exe_path) -> bool:
+    """上次成功构建的指纹与本次一致且产物仍在时返回 True。"""
+    try:
+        return Path(exe_path).exists() and BUILD_STAMP.read_text(encoding="utf-8") == fingerprint
+    except OSError:
+        return False
+
+
+def atomic_write_text(path, text: str, encoding: str = "utf-8"):
+    """先写临时文件再 os.replace，被中断时不会留下半截文件。"""
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding=encoding)
+    os.replace(tmp, path)
+
+
+def write_text_if_changed(path, text: str, encoding: str = "utf-8") -> bool:
+    """内容不变时不重写文件（保持 mtime 不变），返回是否真的写入。"""
+    path = Path(path)
+    try:
+        if path.read_text(encoding=encoding) == text:
+            return False
+    except (OSError, UnicodeError):
+        pass
+    path.write_text(text, encoding=encoding)
+    return True
+
+
+# PyInstaller --version-file 模板（导入时 dedent 一次，每次构建只做 str.format）
+VERSION_TPL = dedent("""
+    # UTF-8
+    VSVersionInfo(
+      ffi=FixedFileInfo(
+        filevers=({filevers}, 0),
+        prodvers=({filevers}, 0),
+        mask=0x3f,
+        flags=0x0,
+        OS=0x40004,
+        fileType=0x1,
+        subtype=0x0,
+        date=(0, 0)
+      ),
+      kids=[
+        StringFileInfo([
+          StringTable('040904B0', [
+            StringStruct('CompanyName', '{company}'),
+            StringStruct('FileDescription', '{desc}'),
+            StringStruct('FileVersion', '{version}'),
+            StringStruct('ProductName', '{app}'),
+            StringStruct('ProductVersion', '{version}')
+          ])
+        ]),
+        VarFileInfo([VarStruct('Translation', [1033, 1200])])
+      ]
+    )
+""").strip()
+
+
+_PIL_IMAGE = None
+
+
+def _pil():
+    """Pillow 的 Image 模块，首次使用时才导入，之后复用同一个句柄。"""
+    global _PIL_IMAGE
+    if _PIL_IMAGE is None:
+        from PIL import Image
+        _PIL_IMAGE = Image
+    return _PIL_IMAGE
+
+
+@functools.lru_cache(maxsize=4)
+def load_png(png_path):
+    """解码 PNG 为 RGBA，同一路径只解码一次（ICO 与启动画面等处共用）。"""
+    return _pil().open(png_path).convert("RGBA")
+
+
+# ICO 目录项的宽高只有 1 字节，最大只能表示 256（记为 0），更大的尺寸无法写入
+ICO_SIZES = (256, 128, 64, 48, 32)
+
+
+def _png_bytes(img) -> bytes:
+    """把单个尺寸的图像编码为尽量小的 PNG；本机有 pngquant 时再做一次调色板量化。"""
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", optimize=True)
+    data = buf.getvalue()
+
+    pngquant = shutil.which("pngquant")
+    if pngquant:
+        res = subprocess.run(
+            [pngquant, "--quality=75-95", "-"],
+            input=data, capture_output=True,
+        )
+        # 质量达不到要求时 pngquant 返回非 0，此时保留原始 PNG
+        if res.returncode == 0 and res.stdout and len(res.stdout) < len(data):
+            data = res.stdout
+    return data
+
+
+def build_ico(png_path, ico_path, sizes=ICO_SIZES):
+    """
+    由 PNG 生成多尺寸 ICO：
+    - 只解码一次 PNG，按尺寸从大到小链式 LANCZOS 缩放（每级以上一级结果为源）
+    - 每帧以 optimize=True 编码为 PNG
+    - 直接写 ICO 容器（Pillow 的 ICO 保存会重新编码帧，忽略 optimize）
+    """
+    Image = _pil()
+    cur = load_png(str(png_path))
+    frames = []
+    for s in sorted(sizes, reverse=True):
+        if cur.size != (s, s):
+            cur = cur.resize((s, s), Image.LANCZOS)
+        frames.append((s, _png_bytes(cur)))
+
+    header = struct.pack("<HHH", 0, 1, len(frames))
+    offset = len(header) + 16 * len(frames)
+    entries, payload = [], []
+    for s, png in frames:
+        dim = 0 if s >= 256 else s
+        entries.append(struct.pack("<BBBBHHII", dim, dim, 0, 0, 1, 32, len(png), offset))
+        payload.append(png)
+        offset += len(png)
+
+    Path(ico_path).write_bytes(header + b"".join(entries) + b"".join(payload))
+
+
+# .parquet 文件关联注册表模板：{root} 为注册表根，{app}/{exe} 为程序名和已转义的 EXE 路径
+_REG_TEMPLATE = r"""Windows Registry Editor Version 5.00
+
+[{root}\.parquet]
+@="{app}File"
+
+[{root}\{app}File]
+@="Parquet File"
+
+[{root}\{app}File\DefaultIcon]
+@="\"{exe}\",0"
+
+[{root}\{app}File\shell\open\command]
+@="\"{exe}\" \"%1\""
+"""
+_REG_ROOT_SYS = "HKEY_CLASSES_ROOT"
+_REG_ROOT_USER = r"HKEY_CURRENT_USER\Software\Classes"
+
+
+def write_assoc_regs(app_name: str, exe_path: Path, system: bool = True):
+    """
+    生成 .parquet 关联用的 .reg 文件：
+    - associate_parquet_user.reg：用户级（无需管理员）
+    - associate_parquet.reg：系统级（需要管理员，system=True 时生成）
+    以 UTF-8 BOM 写出，regedit 才能正确识别路径中的非 ASCII 字符。
+    """
+    exe = str(Path(exe_path).resolve()).replace("\\", "\\\\")  # .reg 需要转义反斜杠
+    targets = [("associate_parquet_user.reg", _REG_ROOT_USER)]
+    if system:
+        targets.append(("associate_parquet.reg", _REG_ROOT_SYS))
+    for name, root in targets:
+        atomic_write_text(
+            name,
+            _REG_TEMPLATE.format(root=root, app=app_name, exe=exe),
+            encoding="utf-8-sig",
+        )
+    return [name for name, _ in targets]
@@ -6,16 +6,24 @@
 - 自动安装依赖
 - PNG -> ICO（多尺寸，可选）
 - 生成版本信息
-- 调用 PyInstaller API 打包（嵌入并打包 ICO 资源）
-- 收集 pyarrow/pandas/PyQt6 资源，自动带上 Qt plugins 和 translations
+- 调用 PyInstaller API 打包（默认 onedir，--onefile 可选；嵌入并打包 ICO 资源）
+- 按入口脚本的导入收集 pyarrow/pandas/PyQt6 资源（未使用则排除），只带必要的 Qt plugins 和 translations
 - 生成系统级 & 用户级 .reg 文件用于关联 .parquet
 """
 
 import os
 import sys
+import shutil
+import argparse
 import subprocess
 from pathlib import Path
-from textwrap import dedent
+from importlib.util import find_spec
+
+from _buildutil import (
+    BUILD_STAMP, VERSION_TPL, build_fingerprint, build_ico, build_up_to_date,
+    collect_package_files, data_args, is_stale, qt6_root, upx_args, upx_root,
+    write_assoc_regs, write_text_if_changed,
+)
 
 # ===================== 可配置参数 =====================
 APP_NAME     = "ParquetViewer"
@@ -27,11 +35,17 @@ COMPANY      = "ParquetViewer"
 DESC         = "Parquet File Viewer"
 
 # 打包配置
-ONEFILE        = True    # True: --onefile；False: --onedir
+ONEFILE        = False   # True: --onefile；False: --onedir（默认，启动无需自解压）
 WINDOWED       = True    # True: 无控制台；False: 有控制台
 ADD_QT_PLUGINS = True    # 自动打包 PyQt6 插件目录和翻译目录
 EXTRA_DATAS    = []      # 形如 [("assets", "assets")]
 EXTRA_HOOKS    = []      # 额外 hooks 目录（通常为空）
+QT_PLUGINS     = ("platforms", "imageformats", "styles", "iconengines")  # 仅打包的 Qt 插件目录
+QT_TRANSLATIONS = ("qtbase_en.qm", "qtbase_zh_CN.qm")                  # 仅打包的 Qt 翻译文件
+QT_EXCLUDES    = [                                                     # 用不到的 Qt 模块
+    "PyQt6.QtWebEngineCore", "PyQt6.QtWebEngineWidgets", "PyQt6.QtWebEngineQuick",
+    "PyQt6.QtQml", "PyQt6.QtQuick", "PyQt6.QtMultimedia", "PyQt6.QtNetworkAuth",
+]
 
 # 体积优化（可选）
 USE_UPX        = False                 # 使用 UPX 压缩（需要本机安装 upx）
@@ -39,93 +53,93 @@ UPX_DIR        = r"C:\tools\upx"       # upx 所在路径（或把 upx 加到 PA
 
 # onefile 运行时临时目录（可选，缺省 None 使用系统临时目录）
 RUNTIME_TMPDIR = None  # 例如 ".\\._tmp"
+
+# 字节码优化级别（--optimize，等同 python -OO）：2 = 去掉 assert 和 docstring，
+# 包更小；代价是运行时 assert 不再生效、__doc__ 为 None
+PY_OPTIMIZE    = 2
 # =====================================================
 
 
-def pip_install(pkg: str):
-    print(f"[*] ensuring package: {pkg}")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", pkg])
+# pip 包名 -> import 模块名（两者不一致时需要映射）
+PKG_MODULES = {"pyinstaller": "PyInstaller", "pillow": "PIL"}
+
+
+def pip_install(*pkgs: str):
+    print(f"[*] installing packages: {' '.join(pkgs)}")
+    subprocess.check_call([sys.executable, "-m", "pip", "install", *pkgs])
 
 
 def ensure_deps():
-    # 基础
-    try:
-        import PyInstaller  # noqa
-    except Exception:
-        pip_install("pyinstaller")
-    # 运行依赖
-    for pkg in ["pillow", "pandas", "pyarrow", "PyQt6"]:
-        mod = pkg.split("==")[0].split(">=")[0]
-        try:
-            __import__(mod)
-        except Exception:
-            pip_install(pkg)
+    # 只收集缺失的包，一次 pip 调用装完；全部已安装则不启动 pip
+    missing = []
+    for pkg in ["pyinstaller", "pillow", "pandas", "pyarrow", "duckdb", "PyQt6"]:
+        name = pkg.split("==")[0].split(">=")[0]
+        if find_spec(PKG_MODULES.get(name, name)) is None:
+            missing.append(pkg)
+    if missing:
+        pip_install(*missing)
 
 
 def make_ico():
     """将 ICON_PNG 生成多分辨率 ICO。如果 PNG 不存在则跳过。"""
     src = Path(ICON_PNG)
     if not src.exists():
-        print(f"[!] {ICON_PNG} not found, skip ICO build (place a 512x512 png and rerun if needed).")
+        if not Path(ICON_ICO).exists():
+            print(f"[!] {ICON_PNG} not found, skip ICO build (place a 512x512 png and rerun if needed).")
         return False
-    from PIL import Image
-    im = Image.open(src).convert("RGBA")
-    sizes = [512, 256, 128, 64, 48, 32]
-    im.save(ICON_ICO, format="ICO", sizes=[(s, s) for s in sizes])
+    if not is_stale(ICON_ICO, src):
+        print(f"[=] ICO up to date: {ICON_ICO}")
+        return True
+    build_ico(src, ICON_ICO)
     print(f"[+] ICO created: {ICON_ICO}")
     return True
 
 
 def write_version_file():
-    vf = Path("file_version.txt")
-    vf.write_text(dedent(f"""
-    # UTF-8
-    VSVersionInfo(
-      ffi=FixedFileInfo(
-        filevers=({VERSION_STR.replace('.', ',')}, 0),
-        prodvers=({VERSION_STR.replace('.', ',')}, 0),
-        mask=0x3f,
-        flags=0x0,
-        OS=0x40004,
-        fileType=0x1,
-        subtype=0x0,
-        date=(0, 0)
-      ),
-      kids=[
-        StringFileInfo([
-          StringTable('040904B0', [
-            StringStruct('CompanyName', '{COMPANY}'),
-            StringStruct('FileDescription', '{DESC}'),
-            StringStruct('FileVersion', '{VERSION_STR}'),
-            StringStruct('ProductName', '{APP_NAME}'),
-            StringStruct('ProductVersion', '{VERSION_STR}')
-          ])
-        ]),
-        VarFileInfo([VarStruct('Translation', [1033, 1200])])
-      ]
+    text = VERSION_TPL.format(
+        filevers=VERSION_STR.replace(".", ","),
+        version=VERSION_STR, company=COMPANY, desc=DESC, app=APP_NAME,
     )
-    """).strip(), encoding="utf-8")
-    print("[+] version file written: file_version.txt")
+    if write_text_if_changed("file_version.txt", text):
+        print("[+] version file written: file_version.txt")
+    else:
+        print("[=] version file up to date: file_version.txt")
 
 
 def guess_qt_plugin_adddatas(args_list):
-    """自动把 PyQt6 的 plugins 和 translations 目录加入 --add-data。"""
+    """把 PyQt6 必要的插件子目录和少量翻译文件加入 --add-data（与 slim 构建一致）。"""
     try:
-        import PyQt6, inspect  # noqa
-        base = Path(inspect.getfile(PyQt6)).parent  # .../site-packages/PyQt6
-        qt6 = base / "Qt6"
-        plugins = qt6 / "plugins"
-        translations = qt6 / "translations"
-        if plugins.exists():
-            args_list += ["--add-data", f"{str(plugins)};PyQt6/Qt6/plugins"]
-            print(f"[+] Added PyQt6 plugins: {plugins}")
-        if translations.exists():
-            args_list += ["--add-data", f"{str(translations)};PyQt6/Qt6/translations"]
-            print(f"[+] Added PyQt6 translations: {translations}")
+        qt6 = qt6_root()
+        pairs = [(qt6 / "plugins" / name, f"PyQt6/Qt6/plugins/{name}") for name in QT_PLUGINS]
+        pairs += [(qt6 / "translations" / name, "PyQt6/Qt6/translations") for name in QT_TRANSLATIONS]
+        for src, _ in pairs:
+            if src.exists():
+                print(f"[+] Added PyQt6 {src.relative_to(qt6).as_posix()}: {src}")
+        args_list += data_args(pairs)
     except Exception as e:
         print(f"[!] Failed to add PyQt6 plugins/translations: {e}")
 
 
+def entry_imports(script: str) -> set:
+    """用 AST 扫描入口脚本，返回其导入的顶层模块名集合。"""
+    import ast
+    tree = ast.parse(Path(script).read_text(encoding="utf-8"))
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+def output_exe() -> Path:
+    """打包产物 EXE 的位置（onefile 在 dist/ 下，onedir 在 dist/APP_NAME/ 下）。"""
+    if ONEFILE:
+        return Path("dist") / f"{APP_NAME}.exe"
+    return Path("dist") / APP_NAME / f"{APP_NAME}.exe"
+
+
 def run_pyinstaller():
     from PyInstaller.__main__ import run as pyinstaller_run
 
@@ -136,11 +150,41 @@ def run_pyinstaller():
         ENTRY_SCRIPT,
         "--name", APP_NAME,
         "--noconfirm",
-        "--clean",                     # 清理历史缓存
-        "--collect-all", "pyarrow",    # 收集 pyarrow 全部资源（dll/pyd/数据）
-        "--collect-data", "pandas",    # 收集 pandas 数据文件（如 tz/locale）
-        "--collect-submodules", "PyQt6",
     ]
+    # 默认复用 build/ 下的 Analysis 缓存；CLEAN_BUILD=1 时才让 PyInstaller 全量重分析
+    if os.environ.get("CLEAN_BUILD") == "1":
+        args.append("--clean")
+
+    # 按入口脚本实际导入决定收集/排除（DuckDB 版本无需 pandas/pyarrow/numpy）
+    used = entry_imports(ENTRY_SCRIPT)
+    uses_pandas = "pandas" in used
+    uses_pyarrow = "pyarrow" in used or uses_pandas  # pandas.read_parquet 依赖 pyarrow 引擎
+    uses_numpy = "numpy" in used or uses_pandas or uses_pyarrow
+    if uses_pyarrow:
+        # 收集 pyarrow 全部资源（dll/pyd/数据）：预先并行扫描目录直接生成参数，
+        # 代替 --collect-all 的逐模块导入 + 遍历；模块图仍由 --collect-submodules 负责
+        datas, binaries = collect_package_files("pyarrow")
+        args += data_args(datas)
+        args += data_args(binaries, "--add-binary")
+        args += ["--collect-submodules", "pyarrow"]
+        print(f"[+] pyarrow: {len(datas)} data entries, {len(binaries)} binaries")
+    else:
+        args += ["--exclude-module", "pyarrow"]
+    if uses_pandas:
+        # 收集 pandas 数据文件（如 tz/locale）
+        datas, _ = collect_package_files("pandas")
+        args += data_args(datas)
+    else:
+        args += ["--exclude-module", "pandas"]
+    if not uses_numpy:
+        args += ["--exclude-module", "numpy"]
+    if "PyQt6" in used:
+        args += ["--collect-submodules", "PyQt6"]
+
+    # -OO 编译冻结模块；非 Windows 下顺带 strip 二进制符号
+    args += ["--optimize", str(PY_OPTIMIZE)]
+    if not sys.platform.startswith("win"):
+        args.append("--strip")
 
     if WINDOWED:
         args.append("--windowed")
@@ -148,13 +192,14 @@ def run_pyinstaller():
         args.append("--onefile")
         if RUNTIME_TMPDIR:
             args += ["--runtime-tmpdir", RUNTIME_TMPDIR]
+        # 启动画面：bootloader 解压期间先显示，程序主窗口出现后关闭
+        if Path(ICON_PNG).exists():
+            args += ["--splash", ICON_PNG]
 
-    if USE_UPX:
-        # 需要先安装 UPX 并把路径配置正确，或在 PATH 中
-        if UPX_DIR and Path(UPX_DIR).exists():
-            args += ["--upx-dir", UPX_DIR]
-        else:
-            print("[!] USE_UPX=True but UPX_DIR not found; skip UPX.")
+    # UPX：需要先安装 UPX 并把路径配置正确，或在 PATH 中
+    if USE_UPX and upx_root(UPX_DIR) is None:
+        print("[!] USE_UPX=True but upx not found in UPX_DIR or PATH; skip UPX.")
+    args += upx_args(USE_UPX, UPX_DIR)
 
     # icon（优先 ICO；没有再退 PNG）
     if Path(ICON_ICO).exists():
@@ -168,14 +213,14 @@ def run_pyinstaller():
 
     # 额外资源（把 ICO 也作为运行时资源打进包，QIcon 可读取）
     datas = list(EXTRA_DATAS)
-    if Path(ICON_ICO).exists():
-        datas.append((ICON_ICO, "."))  # 放到可执行同目录（onefile 会解到临时目录）
-    for src, dest in datas:
-        args += ["--add-data", f"{src};{dest}"]
+    datas.append((ICON_ICO, "."))  # 放到可执行同目录（onefile 会解到临时目录）；不存在时自动跳过
+    args += data_args(datas)
 
-    # Qt 插件/翻译
+    # Qt 插件/翻译（只带必要子集）
     if ADD_QT_PLUGINS:
         guess_qt_plugin_adddatas(args)
+    for mod in QT_EXCLUDES:
+        args += ["--exclude-module", mod]
 
     # 额外 hook（一般用不上）
     for h in EXTRA_HOOKS:
@@ -183,50 +228,19 @@ def run_pyinstaller():
 
     print("[*] PyInstaller args:")
     print("    " + " ".join(args))
+    # 入口脚本 / 图标 / 版本信息 / 参数都没变且产物还在：跳过整个 PyInstaller
+    fingerprint = build_fingerprint([ENTRY_SCRIPT, ICON_ICO, "file_version.txt"], args)
+    if build_up_to_date(fingerprint, output_exe()):
+        print("[=] sources unchanged, skip PyInstaller (CLEAN_BUILD=1 to force).")
+        return
     pyinstaller_run(args)
+    BUILD_STAMP.write_text(fingerprint, encoding="utf-8")
 
 
 def write_file_association_regs(exe_path: Path):
     """生成系统级 & 用户级 .reg 文件使 .parquet 关联到本程序。"""
-    exe_abs = str(exe_path.resolve())
-    exe_abs_escaped = exe_abs.replace("\\", "\\\\")  # .reg 需要转义反斜杠
-
-    # 系统级（需要管理员）
-    reg = Path("associate_parquet.reg")
-    reg.write_text(dedent(f"""
-    Windows Registry Editor Version 5.00
-
-    [HKEY_CLASSES_ROOT\\.parquet]
-    @="{APP_NAME}File"
-
-    [HKEY_CLASSES_ROOT\\{APP_NAME}File]
-    @="Parquet File"
-
-    [HKEY_CLASSES_ROOT\\{APP_NAME}File\\DefaultIcon]
-    @="\\"{exe_abs_escaped}\\",0"
-
-    [HKEY_CLASSES_ROOT\\{APP_NAME}File\\shell\\open\\command]
-    @="\\"{exe_abs_escaped}\\" \\"%1\\""
-    """).strip(), encoding="utf-8")
+    write_assoc_regs(APP_NAME, exe_path, system=True)
     print("   Extra: associate_parquet.reg generated (system-level).")
-
-    # 用户级（无管理员）
-    reg_user = Path("associate_parquet_user.reg")
-    reg_user.write_text(dedent(f"""
-    Windows Registry Editor Version 5.00
-
-    [HKEY_CURRENT_USER\\Software\\Classes\\.parquet]
-    @="{APP_NAME}File"
-
-    [HKEY_CURRENT_USER\\Software\\Classes\\{APP_NAME}File]
-    @="Parquet File"
-
-    [HKEY_CURRENT_USER\\Software\\Classes\\{APP_NAME}File\\DefaultIcon]
-    @="\\"{exe_abs_escaped}\\",0"
-
-    [HKEY_CURRENT_USER\\Software\\Classes\\{APP_NAME}File\\shell\\open\\command]
-    @="\\"{exe_abs_escaped}\\" \\"%1\\""
-    """).strip(), encoding="utf-8")
     print("   Extra: associate_parquet_user.reg generated (user-level, no admin).")
 
 
@@ -240,8 +254,11 @@ def clean_previous_builds_if_requested():
         p = Path(d)
         if p.exists():
             try:
+                shutil.rmtree(p)
+            except PermissionError:
+                # 只读属性 / 超长路径时退回系统命令
                 subprocess.call(["cmd", "/c", f'rmdir /s /q "{p}"'])
-            except Exception:
+            except OSError:
                 pass
     # 删除 spec
     spec = Path(f"{APP_NAME}.spec")
@@ -252,15 +269,48 @@ def clean_previous_builds_if_requested():
             pass
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="打包 PyQt6 Parquet Viewer")
+    parser.add_argument(
+        "--onefile", action="store_true",
+        help="打包为单个 EXE（每次启动需自解压到临时目录，启动较慢）",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--only-version", action="store_true",
+        help="只重新生成 file_version.txt，不打包",
+    )
+    mode.add_argument(
+        "--regen-assoc", action="store_true",
+        help="只根据已打包的 EXE 重新生成 .reg 关联文件，不打包",
+    )
+    return parser.parse_args()
+
+
 def main():
+    global ONEFILE
+    opts = parse_args()
+    if opts.onefile:
+        ONEFILE = True
+
+    # 轻量模式：不检查依赖、不导入 PyInstaller
+    if opts.only_version:
+        write_version_file()
+        return
+    if opts.regen_assoc:
+        if output_exe().exists():
+            write_file_association_regs(output_exe())
+        else:
+            print(f"[!] EXE not found: {output_exe()}")
+        return
+
     clean_previous_builds_if_requested()
     ensure_deps()
-    if not Path(ICON_ICO).exists():
-        _ = make_ico()  # 若没有 PNG，会跳过；已有 ICO 也 OK
+    make_ico()  # 若没有 PNG，会跳过；ICO 比 PNG 新时也跳过
     write_version_file()
     run_pyinstaller()
 
-    out = Path("dist") / (APP_NAME + (".exe" if ONEFILE else ""))
+    out = output_exe()
     print("\n✅ Done.")
     if out.exists():
         print(f"   Output: {out}")
@@ -274,8 +324,11 @@ def main():
         print("[!] EXE not found; skip generating .reg with absolute path.")
 
     print("\nTips:")
-    print("  - 若图标/资源未刷新，先清缓存再重打：")
+    print("  - 默认增量构建（复用 build/ 缓存）；修改 Qt 插件选择或增删依赖包后，")
+    print("    或图标/资源未刷新时，先清缓存再重打一次：")
     print("      set CLEAN_BUILD=1 && python build_parquet_viewer.py")
+    print("  - 默认 onedir 布局：分发时把 dist/ParquetViewer 整个目录打成 zip 即可；")
+    print("    需要单文件时：python build_parquet_viewer.py --onefile")
     print("  - 如需将 .parquet 关联到该程序：双击导入 associate_parquet_user.reg（用户级，无需管理员）")
     print("  - 若要安装到 Program Files 并系统级关联，建议用安装器（Inno Setup/WiX）或导入 associate_parquet.reg（管理员）")
 
@@ -12,9 +12,16 @@ Slim 打包：DuckDB + PyQt6 + onedir + UPX（无 pandas/pyarrow）
 import os
 import sys
 import shutil
+import argparse
 import subprocess
 from pathlib import Path
-from textwrap import dedent
+from importlib.util import find_spec
+
+from _buildutil import (
+    BUILD_STAMP, VERSION_TPL, build_fingerprint, build_ico, build_up_to_date,
+    data_args, is_stale, qt6_root, upx_args, upx_root, write_assoc_regs,
+    write_text_if_changed,
+)
 
 # ====== 配置区 ======
 APP_NAME       = "ParquetViewer"
@@ -28,66 +35,57 @@ DESC           = "Parquet File Viewer (DuckDB)"
 WINDOWED       = True                          # 隐藏控制台
 USE_UPX        = True                          # 需要本机安装 upx
 UPX_DIR        = r"C:\tools\upx"               # 若已在 PATH，可留空
-CLEAN_FIRST    = True                          # 构建前清理 build/dist
+CLEAN_FIRST    = os.environ.get("CLEAN_BUILD") == "1"  # 构建前清理 build/dist（默认增量构建）
+PY_OPTIMIZE    = 2                             # 字节码优化：2 = -OO（去 assert/docstring）
+QT_PLUGINS     = ("platforms", "imageformats")  # 仅打包的 Qt 插件目录
 # ====================
 
+EXE_PATH = Path("dist") / APP_NAME / f"{APP_NAME}.exe"  # onedir 产物
+
+
+# pip 包名 -> import 模块名（两者不一致时需要映射）
+PKG_MODULES = {"pyinstaller": "PyInstaller", "pillow": "PIL"}
+
 
-def pip_install(p: str):
-    print(f"[*] ensuring {p}")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", p])
+def pip_install(*pkgs: str):
+    print(f"[*] installing {' '.join(pkgs)}")
+    subprocess.check_call([sys.executable, "-m", "pip", "install", *pkgs])
 
 
 def ensure_deps():
+    missing = []
     for p in ["pyinstaller", "PyQt6", "duckdb", "pillow"]:
-        try:
-            __import__(p.split("==")[0].split(">=")[0])
-        except Exception:
-            pip_install(p)
+        name = p.split("==")[0].split(">=")[0]
+        if find_spec(PKG_MODULES.get(name, name)) is None:
+            missing.append(p)
+    if missing:
+        pip_install(*missing)
 
 
 def make_ico() -> bool:
     """将 ICON_PNG 生成多分辨率 ICO。如果 PNG 不存在则跳过。"""
     src = Path(ICON_PNG)
     if not src.exists():
-        print(f"[!] {ICON_PNG} not found, skip ICO generating.")
+        if not Path(ICON_ICO).exists():
+            print(f"[!] {ICON_PNG} not found, skip ICO generating.")
         return False
-    from PIL import Image
-    img = Image.open(src).convert("RGBA")
-    img.save(ICON_ICO, format="ICO",
-             sizes=[(512, 512), (256, 256), (128, 128), (64, 64), (48, 48), (32, 32)])
+    if not is_stale(ICON_ICO, src):
+        print(f"[=] ICO up to date: {ICON_ICO}")
+        return True
+    build_ico(src, ICON_ICO)
     print(f"[+] ICO created: {ICON_ICO}")
     return True
 
 
 def write_version_file():
-    Path("file_version.txt").write_text(dedent(f"""
-    # UTF-8
-    VSVersionInfo(
-      ffi=FixedFileInfo(
-        filevers=({VERSION_STR.replace('.', ',')}, 0),
-        prodvers=({VERSION_STR.replace('.', ',')}, 0),
-        mask=0x3f,
-        flags=0x0,
-        OS=0x40004,
-        fileType=0x1,
-        subtype=0x0,
-        date=(0, 0)
-      ),
-      kids=[
-        StringFileInfo([
-          StringTable('040904B0', [
-            StringStruct('CompanyName', '{COMPANY}'),
-            StringStruct('FileDescription', '{DESC}'),
-            StringStruct('FileVersion', '{VERSION_STR}'),
-            StringStruct('ProductName', '{APP_NAME}'),
-            StringStruct('ProductVersion', '{VERSION_STR}')
-          ])
-        ]),
-        VarFileInfo([VarStruct('Translation', [1033, 1200])])
-      ]
+    text = VERSION_TPL.format(
+        filevers=VERSION_STR.replace(".", ","),
+        version=VERSION_STR, company=COMPANY, desc=DESC, app=APP_NAME,
     )
-    """).strip(), encoding="utf-8")
-    print("[+] version file written.")
+    if write_text_if_changed("file_version.txt", text):
+        print("[+] version file written.")
+    else:
+        print("[=] version file up to date.")
 
 
 def run_pyinstaller():
@@ -100,9 +98,15 @@ def run_pyinstaller():
         ENTRY_SCRIPT,
         "--name", APP_NAME,
         "--noconfirm",
-        "--clean",
         # onedir：不要 --onefile
     ]
+    # 默认复用 build/ 下的 Analysis 缓存，只有全量清理时才加 --clean
+    if CLEAN_FIRST:
+        args.append("--clean")
+    # -OO 编译冻结模块；非 Windows 下顺带 strip 二进制符号
+    args += ["--optimize", str(PY_OPTIMIZE)]
+    if not sys.platform.startswith("win"):
+        args.append("--strip")
     if WINDOWED:
         args.append("--windowed")
 
@@ -117,8 +121,7 @@ def run_pyinstaller():
         args += ["--version-file", "file_version.txt"]
 
     # 运行时附带 ICO（可选，用于 setWindowIcon / 关联）
-    if Path(ICON_ICO).exists():
-        args += ["--add-data", f"{ICON_ICO};."]
+    args += data_args([(ICON_ICO, ".")])
 
     # 显式排除不需要的模块（瘦身关键）
     for mod in [
@@ -132,58 +135,66 @@ def run_pyinstaller():
     # 某些环境下 duckdb 需声明 hidden-import
     args += ["--hidden-import", "duckdb"]
 
-    # 精简 Qt 插件：只带 platforms 和 imageformats
+    # 精简 Qt 插件：只带 QT_PLUGINS 中列出的目录
     try:
-        import inspect, PyQt6
-        base = Path(inspect.getfile(PyQt6)).parent
-        qt6 = base / "Qt6"
-        platforms = qt6 / "plugins" / "platforms"
-        imageformats = qt6 / "plugins" / "imageformats"
-        if platforms.exists():
-            args += ["--add-data", f"{str(platforms)};PyQt6/Qt6/plugins/platforms"]
-            print(f"[+] Added platforms: {platforms}")
-        if imageformats.exists():
-            args += ["--add-data", f"{str(imageformats)};PyQt6/Qt6/plugins/imageformats"]
-            print(f"[+] Added imageformats: {imageformats}")
+        plugins = qt6_root() / "plugins"
+        pairs = [(plugins / name, f"PyQt6/Qt6/plugins/{name}") for name in QT_PLUGINS]
+        for src, _ in pairs:
+            if src.exists():
+                print(f"[+] Added {src.name}: {src}")
+        args += data_args(pairs)
     except Exception as e:
         print(f"[!] add Qt plugins failed: {e}")
 
     # UPX
-    if USE_UPX:
-        if UPX_DIR and Path(UPX_DIR).exists():
-            args += ["--upx-dir", UPX_DIR]
-        elif shutil.which("upx"):
-            pass
-        else:
-            print("[!] USE_UPX=True 但未找到 upx，可到 https://upx.github.io/ 下载或将其加入 PATH，或改为 USE_UPX=False。")
+    if USE_UPX and upx_root(UPX_DIR) is None:
+        print("[!] USE_UPX=True 但未找到 upx，可到 https://upx.github.io/ 下载或将其加入 PATH，或改为 USE_UPX=False。")
+    args += upx_args(USE_UPX, UPX_DIR)
 
     print("[*] PyInstaller args:")
     print("    " + " ".join(args))
+    # 入口脚本 / 图标 / 版本信息 / 参数都没变且产物还在：跳过整个 PyInstaller
+    fingerprint = build_fingerprint([ENTRY_SCRIPT, ICON_ICO, "file_version.txt"], args)
+    if build_up_to_date(fingerprint, EXE_PATH):
+        print("[=] sources unchanged, skip PyInstaller (CLEAN_BUILD=1 to force).")
+        return
     pyrun(args)
+    BUILD_STAMP.write_text(fingerprint, encoding="utf-8")
 
 
 def write_assoc_user_reg(exe_path: Path):
     """生成用户级（无需管理员）.parquet 关联注册表文件。"""
-    exe_abs = str(exe_path.resolve()).replace("\\", "\\\\")
-    Path("associate_parquet_user.reg").write_text(dedent(f"""
-    Windows Registry Editor Version 5.00
-
-    [HKEY_CURRENT_USER\\Software\\Classes\\.parquet]
-    @="{APP_NAME}File"
-
-    [HKEY_CURRENT_USER\\Software\\Classes\\{APP_NAME}File]
-    @="Parquet File"
+    write_assoc_regs(APP_NAME, exe_path, system=False)
+    print("[+] associate_parquet_user.reg generated (user-level).")
 
-    [HKEY_CURRENT_USER\\Software\\Classes\\{APP_NAME}File\\DefaultIcon]
-    @="\\"{exe_abs}\\",0"
 
-    [HKEY_CURRENT_USER\\Software\\Classes\\{APP_NAME}File\\shell\\open\\command]
-    @="\\"{exe_abs}\\" \\"%1\\""
-    """).strip(), encoding="utf-8")
-    print("[+] associate_parquet_user.reg generated (user-level).")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Slim 打包 ParquetViewer（DuckDB 版）")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--only-version", action="store_true",
+        help="只重新生成 file_version.txt，不打包",
+    )
+    mode.add_argument(
+        "--regen-assoc", action="store_true",
+        help="只根据已打包的 EXE 重新生成 .reg 关联文件，不打包",
+    )
+    return parser.parse_args()
 
 
 def main():
+    # 轻量模式：不检查依赖、不导入 PyInstaller
+    opts = parse_args()
+    if opts.only_version:
+        write_version_file()
+        return
+    if opts.regen_assoc:
+        if EXE_PATH.exists():
+            write_assoc_user_reg(EXE_PATH)
+        else:
+            print(f"[!] EXE not found: {EXE_PATH}")
+        return
+
     # 可选：一键清理历史产物
     if CLEAN_FIRST:
         for d in ["build", "dist", "__pycache__"]:
@@ -200,12 +211,11 @@ def main():
                 pass
 
     ensure_deps()
-    if not Path(ICON_ICO).exists():
-        _ = make_ico()
+    make_ico()
     write_version_file()
     run_pyinstaller()
 
-    exe = Path("dist") / APP_NAME / f"{APP_NAME}.exe"  # onedir
+    exe = EXE_PATH
     if exe.exists():
         print(f"\n✅ Done. Output: {exe}")
         write_assoc_user_reg(exe)
@@ -213,6 +223,7 @@ def main():
         print("\n[!] Build finished but exe not found. Check dist/ structure.")
 
     print("\nTips:")
+    print("  - 默认增量构建；修改 Qt 插件选择或增删依赖包后，用 CLEAN_BUILD=1 全量重打一次。")
     print("  - 体积仍嫌大时：保持 onedir + USE_UPX=True；或尝试 Nuitka。")
     print("  - 双击 associate_parquet_user.reg 可把 .parquet 关联到该 EXE（用户级，无需管理员）。")
 
@@ -1,15 +1,42 @@
 import sys
+import functools
+from contextlib import contextmanager
 from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                             QHBoxLayout, QTableWidget, QTableWidgetItem,
+                             QHBoxLayout, QTableView,
                              QPushButton, QLineEdit, QLabel, QSplitter,
                              QTreeWidget, QTreeWidgetItem, QHeaderView,
-                             QMessageBox, QFileDialog, QTabWidget)
-from PyQt6.QtCore import Qt, QSettings, QUrl, QTimer
-from PyQt6.QtGui import QColor, QFont, QDragEnterEvent, QDropEvent, QIcon, QGuiApplication, QCursor
+                             QMessageBox, QFileDialog, QTabWidget, QProgressBar)
+from PyQt6.QtCore import (Qt, QSettings, QUrl, QTimer, QAbstractTableModel, QModelIndex,
+                          QObject, QRunnable, QThreadPool, pyqtSignal)
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QDragEnterEvent, QDropEvent, QIcon, QGuiApplication, QCursor
+import duckdb
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import os
 
+# 以内存映射方式读取 Parquet（省一次堆拷贝）；Windows 下映射期间无法覆盖保存同一文件，故默认关闭
+USE_MMAP = os.environ.get("PARQUET_VIEW_MMAP") == "1"
+
+# 表格共用的颜色与对齐方式：模块级常量，data() 中直接返回，不逐单元格创建
+_COLOR_UP = QColor(220, 38, 38)         # 正数：红
+_COLOR_DOWN = QColor(22, 163, 74)       # 负数：绿
+_COLOR_NEW_ROW = QColor(255, 251, 235)  # 新增行：淡黄色背景
+_CENTER = Qt.AlignmentFlag.AlignCenter
+
+
+@functools.lru_cache(maxsize=None)
+def _bold_font():
+    """标题/结构树节点用的粗体字；QFont 须在 QApplication 之后构造，故首次使用时才创建并缓存"""
+    return QFont("Microsoft YaHei UI", 9, QFont.Weight.Bold)
+
+
+# Arrow 解码线程池用满全部核心（各列 / 各行组并行解码）
+pa.set_cpu_count(os.cpu_count() or 1)
+
 
 # ---------- 资源定位：兼容开发环境与 PyInstaller(onefile) ----------
 def resource_path(relative: str) -> str:
@@ -23,14 +50,271 @@ def resource_path(relative: str) -> str:
     return str(Path.cwd() / relative)
 
 
+class LoadSignals(QObject):
+    """LoadWorker 的信号（QRunnable 不是 QObject，不能直接定义信号）"""
+    finished = pyqtSignal(object, object, str)   # (Arrow 表, DataFrame, 路径)
+    failed = pyqtSignal(str, str)                # (错误信息, 路径)
+
+
+class LoadWorker(QRunnable):
+    """在线程池中读取 Parquet 并转换为 DataFrame，结果通过信号回到 GUI 线程"""
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.signals = LoadSignals()
+
+    def run(self):
+        try:
+            # pre_buffer：按行组合并并预取列块读请求，I/O 与多线程解码重叠
+            table = pq.read_table(self.file_path, memory_map=USE_MMAP,
+                                  use_threads=True, pre_buffer=True)
+            # 每列单独成块，数值列与 Arrow 表共享缓冲区（零拷贝），不再另存一份原始副本
+            df = table.to_pandas(split_blocks=True)
+        except Exception as e:
+            self.signals.failed.emit(str(e), self.file_path)
+            return
+        self.signals.finished.emit(table, df, self.file_path)
+
+
+class ParquetModel(QAbstractTableModel):
+    """
+    以 DataFrame 为数据源的表格模型：
+    - 视图只为可见单元格调用 data()，格式化/着色按需进行
+    - 编辑、新增、删除行不改动 DataFrame，只记录在模型里
+    """
+
+    COLOR_COLUMNS = ('change', 'hang', 'change_rate', 'hange_rat')
+    COLOR_LUT = (_COLOR_DOWN, None, _COLOR_UP)  # 按 sign + 1 取：负绿 / 零 / 正红
+    BLOCK_ROWS = 1024               # 按块批量格式化的行数
+    LAZY_THRESHOLD = 5000           # 超过该行数时按需分批加载（fetchMore）
+    FETCH_ROWS = 1000               # 每批追加到视图的行数
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._df = pd.DataFrame()
+        self._columns = []
+        self._series = []           # 列号 -> Series（列式访问，避免逐次 df.iloc[行, 列]）
+        self._floats = {}           # 列号 -> 浮点列的 float64 ndarray（首次格式化/着色时转换）
+        self._rows = np.arange(0)   # 视图行 -> 源数据行号；新增行用负数编号
+        self._fetched = 0           # 已交给视图的源数据行数
+        self._next_new = -1
+        self._edits = {}            # (源行号, 列号) -> 编辑后的文本
+        self._blocks = {}           # (列号, 块号) -> 该块已格式化的字符串数组
+        self._signs = {}            # 列号 -> 着色列的正负号数组（int8）
+
+    def set_dataframe(self, df):
+        """替换数据源（查询 / 重置视图）"""
+        self.beginResetModel()
+        self._df = df
+        self._columns = [str(c) for c in df.columns]
+        self._series = [df.iloc[:, j] for j in range(df.shape[1])]
+        self._floats = {}
+        self._fetched = len(df) if len(df) <= self.LAZY_THRESHOLD else self.FETCH_ROWS
+        self._rows = np.arange(self._fetched)
+        self._next_new = -1
+        self._edits = {}
+        self._blocks = {}
+        self._signs = {}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._fetched < len(self._df)
+
+    def fetchMore(self, parent=QModelIndex()):
+        """视图滚动到底部时追加下一批源数据行"""
+        self._fetch(self.FETCH_ROWS)
+
+    def fetch_all(self):
+        """一次性交出剩余全部行（新增行、保存前调用，保证行序与完整性）"""
+        self._fetch(len(self._df) - self._fetched)
+
+    def _fetch(self, count):
+        count = min(count, len(self._df) - self._fetched)
+        if count <= 0:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self._rows = np.concatenate([self._rows, np.arange(self._fetched, self._fetched + count)])
+        self._fetched += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._columns[section]
+        return str(section + 1)
+
+    def _format_block(self, col, block):
+        """向量化格式化一块源数据（NaN -> 空串，浮点保留两位小数），结果缓存"""
+        cached = self._blocks.get((col, block))
+        if cached is not None:
+            return cached
+        start = block * self.BLOCK_ROWS
+        stop = start + self.BLOCK_ROWS
+        values = self._float_array(col)
+        if values is not None:
+            values = values[start:stop]
+            # tolist() 一次性转为 Python float，再用 % 格式化；实测比 Series.map / np.char.mod 都快
+            texts = np.array(['%.2f' % v for v in values.tolist()], dtype=object)
+            texts[np.isnan(values)] = ""
+        else:
+            series = self._series[col].iloc[start:stop]
+            texts = series.astype(str).to_numpy(dtype=object)
+            texts[series.isna().to_numpy()] = ""
+        self._blocks[(col, block)] = texts
+        return texts
+
+    def _float_array(self, col):
+        """浮点列整列转成 float64 ndarray（NA -> NaN）并缓存；非浮点列返回 None"""
+        if col not in self._floats:
+            series = self._series[col]
+            self._floats[col] = (series.to_numpy(dtype=np.float64, na_value=np.nan)
+                                 if pd.api.types.is_float_dtype(series.dtype) else None)
+        return self._floats[col]
+
+    def _text(self, key, col):
+        if (key, col) in self._edits:
+            return self._edits[(key, col)]
+        if key < 0:
+            return ""
+        block, offset = divmod(key, self.BLOCK_ROWS)
+        return self._format_block(col, block)[offset]
+
+    def _sign(self, key, col):
+        """着色列的正负号：源数据整列一次性计算；编辑过的单元格按文本解析"""
+        if (key, col) in self._edits or key < 0:
+            try:
+                return int(np.sign(float(self._text(key, col))))
+            except ValueError:
+                return 0
+        signs = self._signs.get(col)
+        if signs is None:
+            values = self._float_array(col)
+            if values is None:
+                values = pd.to_numeric(self._series[col], errors='coerce').to_numpy(dtype=np.float64)
+            signs = np.nan_to_num(np.sign(values)).astype(np.int8)
+            self._signs[col] = signs
+        return signs[key]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        key = int(self._rows[index.row()])
+        col = index.column()
+
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._text(key, col)
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return _CENTER
+
+        if role == Qt.ItemDataRole.BackgroundRole and key < 0:
+            return _COLOR_NEW_ROW
+
+        # 数值着色
+        if role == Qt.ItemDataRole.ForegroundRole and self._columns[col] in self.COLOR_COLUMNS:
+            return self.COLOR_LUT[self._sign(key, col) + 1]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return (Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+                | Qt.ItemFlag.ItemIsEditable)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        key = int(self._rows[index.row()])
+        text = "" if value is None else str(value)
+        if text == self._text(key, index.column()):
+            return False  # 未改动：不记为编辑，保存时保留原始精度
+        self._edits[(key, index.column())] = text
+        self.dataChanged.emit(index, index)
+        return True
+
+    def source(self):
+        """当前显示的 DataFrame"""
+        return self._df
+
+    def to_arrow(self, base=None):
+        """
+        按当前行序导出 Arrow 表，列类型与源数据一致：
+        - 未加载的尾部源数据行一并导出，已删除的行不导出，新增行取空值
+        - 只有编辑过的单元格按所在列类型从文本转换后写回，开销与编辑数成正比
+        base 为与当前 DataFrame 对应的 Arrow 表（如加载时的原始表），给出时不再从 pandas 转换；
+        行未增删时也不做 take，未编辑时直接返回 base
+        """
+        rows = np.concatenate([self._rows, np.arange(self._fetched, len(self._df))])
+        table = base if base is not None else pa.Table.from_pandas(self._df, preserve_index=False)
+        if not np.array_equal(rows, np.arange(len(self._df))):
+            table = table.take(pa.array(rows, mask=rows < 0))
+
+        by_col = {}
+        for (key, col), text in self._edits.items():
+            by_col.setdefault(col, {})[key] = text
+        positions = pd.Index(rows)
+        for col, cells in by_col.items():
+            pos = positions.get_indexer(list(cells))
+            texts = np.array(list(cells.values()), dtype=object)
+            keep = pos >= 0  # 编辑后又被删除的行
+            order = np.argsort(pos[keep])
+            pos, texts = pos[keep][order], texts[keep][order]
+            if not len(pos):
+                continue
+            column = table.column(col).combine_chunks()
+            if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                # 字符串列原样保存：首尾空白与有意留空的 "" 都是编辑内容的一部分
+                cells = list(texts)
+            else:
+                # 其他类型去掉首尾空白再转换，留空视为缺失值
+                cells = [t.strip() or None for t in texts]
+            try:
+                values = pa.array(cells, pa.string()).cast(column.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(f"列 {self._columns[col]} 的编辑内容无法转换为 {column.type}:\n{e}")
+            mask = np.zeros(len(rows), dtype=bool)
+            mask[pos] = True
+            table = table.set_column(col, table.field(col), pc.replace_with_mask(column, mask, values))
+        return table
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        self.beginInsertRows(parent, row, row + count - 1)
+        new_keys = np.arange(self._next_new, self._next_new - count, -1)
+        self._next_new -= count
+        self._rows = np.insert(self._rows, row, new_keys)
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        self.beginRemoveRows(parent, row, row + count - 1)
+        self._rows = np.delete(self._rows, np.s_[row:row + count])
+        self.endRemoveRows()
+        return True
+
+
 class ParquetTab(QWidget):
     """单个 Parquet 文件的标签页"""
 
+    load_failed = pyqtSignal(str)  # 后台加载失败（参数为文件路径）
+
+    WIDTH_SAMPLE_ROWS = 50          # 估算列宽时抽样的行数
+
     def __init__(self, file_path=None):
         super().__init__()
         self.df = None
-        self.original_df = None
+        self._arrow = None           # 原始数据（不可变的 Arrow 表），重置视图/SQL 查询都基于它
         self.file_path = file_path
+        self.con = None              # DuckDB 连接（加载文件时创建，整个标签页复用）
+        self._worker = None          # 正在执行的后台加载任务
         self.init_ui()
 
         if file_path:
@@ -161,7 +445,7 @@ class ParquetTab(QWidget):
 
         # SQL 查询区域
         sql_label = QLabel("SQL:")
-        sql_label.setFont(QFont("Microsoft YaHei UI", 9, QFont.Weight.Bold))
+        sql_label.setFont(_bold_font())
         sql_label.setStyleSheet("color: #374151;")
         content_layout.addWidget(sql_label)
 
@@ -184,22 +468,34 @@ class ParquetTab(QWidget):
 
         content_layout.addLayout(sql_input_layout)
 
-        # 状态标签
+        # 状态标签（后台加载时右侧显示忙碌进度条）
+        status_layout = QHBoxLayout()
         self.status_label = QLabel("状态: 就绪")
         self.status_label.setFont(QFont("Microsoft YaHei UI", 8))
         self.status_label.setStyleSheet("color: #6b7280; padding: 5px 0;")
-        content_layout.addWidget(self.status_label)
-
-        # 数据表格
-        self.table_widget = QTableWidget()
+        status_layout.addWidget(self.status_label)
+        status_layout.addStretch()
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # 不确定进度
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setFixedSize(120, 8)
+        self.progress_bar.hide()
+        status_layout.addWidget(self.progress_bar)
+        content_layout.addLayout(status_layout)
+
+        # 数据表格（模型/视图：只渲染可见单元格）
+        self.model = ParquetModel(self)
+        self.table_widget = QTableView()
+        self.table_widget.setModel(self.model)
         self.table_widget.setAlternatingRowColors(True)
-        self.table_widget.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table_widget.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.table_widget.verticalHeader().setDefaultSectionSize(36)
         self.table_widget.verticalHeader().setMinimumSectionSize(36)  # 设置最小行高
         self.table_widget.setFont(QFont("Microsoft YaHei UI", 9))
-        self.table_widget.setEditTriggers(QTableWidget.EditTrigger.DoubleClicked |
-                                          QTableWidget.EditTrigger.EditKeyPressed |
-                                          QTableWidget.EditTrigger.AnyKeyPressed)
+        self.table_widget.setEditTriggers(QTableView.EditTrigger.DoubleClicked |
+                                          QTableView.EditTrigger.EditKeyPressed |
+                                          QTableView.EditTrigger.AnyKeyPressed)
 
         # 设置表格自适应列宽
         self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
@@ -216,110 +512,129 @@ class ParquetTab(QWidget):
         return right_widget
 
     def load_file(self, file_path):
-        """加载 Parquet 文件"""
-        try:
-            self.file_path = file_path
-            self.df = pd.read_parquet(file_path)
-            self.original_df = self.df.copy()
-
-            file_name = os.path.basename(file_path)
-            self.file_label.setText(file_name)
-
-            # 更新文件信息
-            file_size = os.path.getsize(file_path) / 1024 / 1024
-            self.file_info_label.setText(
-                f"文件: {file_name}\n"
-                f"大小: {file_size:.2f} MB\n"
-                f"行数: {len(self.df)}\n"
-                f"列数: {len(self.df.columns)}"
-            )
+        """在后台线程加载 Parquet 文件，界面保持响应"""
+        self.file_path = file_path
+        self.file_label.setText(os.path.basename(file_path))
+        self.status_label.setText("状态: 正在加载...")
+        self.progress_bar.show()
 
+        # 先只读文件尾部的元数据（Schema 与行数），结构树和文件信息立即可见，不等数据读完
+        try:
+            meta = pq.read_metadata(file_path)
+            schema = meta.schema.to_arrow_schema()
+        except Exception:
+            pass  # 文件损坏等错误由后台加载统一报告
+        else:
+            self._show_file_info(file_path, meta.num_rows, len(schema.names))
+            self.update_tree((schema.names, schema.types, meta.num_rows))
+
+        self._worker = LoadWorker(file_path)
+        self._worker.signals.finished.connect(self._on_loaded)
+        self._worker.signals.failed.connect(self._on_load_failed)
+        QThreadPool.globalInstance().start(self._worker)
+
+    def _on_load_failed(self, message, file_path):
+        self._worker = None
+        self.progress_bar.hide()
+        self.status_label.setText("状态: 加载失败")
+        QMessageBox.critical(self, "错误", f"无法打开文件:\n{message}")
+        self.load_failed.emit(file_path)
+
+    def _on_loaded(self, table, df, file_path):
+        """后台加载完成（GUI 线程）：注册查询连接、刷新结构树和表格"""
+        self._worker = None
+        self.progress_bar.hide()
+        try:
+            self._arrow = table
+            self.df = df
+            # 原始 Arrow 表零拷贝注册为 df，之后每次查询直接复用
+            if self.con is None:
+                self.con = duckdb.connect()
+            self.con.register('df', self._arrow)
+
+            self._show_file_info(file_path, len(self.df), len(self.df.columns))
             self.update_tree()
             self.display_data(self.df)
             self.status_label.setText(f"状态: 成功加载 {len(self.df)} 行数据")
-
-            return True
         except Exception as e:
-            QMessageBox.critical(self, "错误", f"无法打开文件:\n{str(e)}")
-            return False
+            self._on_load_failed(str(e), file_path)
+
+    def _show_file_info(self, file_path, num_rows, num_cols):
+        """更新左侧文件信息"""
+        file_name = os.path.basename(file_path)
+        file_size = os.path.getsize(file_path) / 1024 / 1024
+        self.file_info_label.setText(
+            f"文件: {file_name}\n"
+            f"大小: {file_size:.2f} MB\n"
+            f"行数: {num_rows}\n"
+            f"列数: {num_cols}"
+        )
 
-    def update_tree(self):
-        """更新文件结构树"""
+    def update_tree(self, schema=None):
+        """更新文件结构树；schema 为 (列名, 类型, 行数)，缺省时取自已加载的 DataFrame"""
         self.tree_widget.clear()
 
-        if self.df is None:
-            return
-
-        root = QTreeWidgetItem(self.tree_widget)
-        root.setText(0, f"数据表 ({len(self.df)} 行)")
-        root.setFont(0, QFont("Microsoft YaHei UI", 9, QFont.Weight.Bold))
+        if schema is None:
+            if self.df is None:
+                return
+            schema = (self.df.columns, self.df.dtypes, len(self.df))
+        names, types, num_rows = schema
 
-        columns_node = QTreeWidgetItem(root)
-        columns_node.setText(0, "列 (Columns)")
-        columns_node.setFont(0, QFont("Microsoft YaHei UI", 9, QFont.Weight.Bold))
+        # 先在树外搭好整棵子树，再一次性挂到控件上，避免每加一项触发一次模型变更
+        root = QTreeWidgetItem([f"数据表 ({num_rows} 行)"])
+        root.setFont(0, _bold_font())
 
-        for col in self.df.columns:
-            col_item = QTreeWidgetItem(columns_node)
-            col_item.setText(0, col)
-            col_item.setText(1, str(self.df[col].dtype))
+        columns_node = QTreeWidgetItem(["列 (Columns)"])
+        columns_node.setFont(0, _bold_font())
+        columns_node.addChildren([QTreeWidgetItem([str(col), str(dtype)])
+                                  for col, dtype in zip(names, types)])
+        root.addChild(columns_node)
 
-        self.tree_widget.expandAll()
+        self.tree_widget.setUpdatesEnabled(False)
+        try:
+            self.tree_widget.addTopLevelItem(root)
+            self.tree_widget.expandAll()
+        finally:
+            self.tree_widget.setUpdatesEnabled(True)
+
+    @contextmanager
+    def _batch_updates(self):
+        """批量改动期间暂停重绘、视图信号与排序，结束后统一刷新一次"""
+        view = self.table_widget
+        sorting = view.isSortingEnabled()
+        view.setUpdatesEnabled(False)
+        view.blockSignals(True)
+        view.setSortingEnabled(False)
+        try:
+            yield
+        finally:
+            view.setSortingEnabled(sorting)
+            view.blockSignals(False)
+            view.setUpdatesEnabled(True)
 
     def display_data(self, df):
-        """显示数据并自适应列宽"""
-        self.table_widget.clear()
-        self.table_widget.setRowCount(len(df))
-        self.table_widget.setColumnCount(len(df.columns))
-        self.table_widget.setHorizontalHeaderLabels(df.columns.tolist())
-
-        # 填充数据
-        for i in range(len(df)):
-            for j, col in enumerate(df.columns):
-                value = df.iloc[i, j]
-
-                # 格式化显示
-                if pd.isna(value):
-                    display_value = ""
-                elif isinstance(value, float):
-                    display_value = f"{value:.2f}"
-                else:
-                    display_value = str(value)
-
-                item = QTableWidgetItem(display_value)
-
-                # 数值着色
-                if col in ['change', 'hang']:
-                    try:
-                        val = float(value)
-                        if val > 0:
-                            item.setForeground(QColor(220, 38, 38))
-                        elif val < 0:
-                            item.setForeground(QColor(22, 163, 74))
-                    except Exception:
-                        pass
-                elif col in ['change_rate', 'hange_rat']:
-                    try:
-                        val = float(value)
-                        if val > 0:
-                            item.setForeground(QColor(220, 38, 38))
-                        elif val < 0:
-                            item.setForeground(QColor(22, 163, 74))
-                    except Exception:
-                        pass
-
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table_widget.setItem(i, j, item)
-
-        # 自适应列宽
-        self.table_widget.resizeColumnsToContents()
-
-        # 设置最小列宽，避免过窄
-        for col in range(self.table_widget.columnCount()):
-            current_width = self.table_widget.columnWidth(col)
-            if current_width < 80:
-                self.table_widget.setColumnWidth(col, 80)
-            elif current_width > 200:
-                self.table_widget.setColumnWidth(col, 200)
+        """显示数据；列宽只按表头和前几十行估算，不对全表做 resizeColumnsToContents"""
+        with self._batch_updates():
+            self._populate(df)
+
+    def _populate(self, df):
+        self.model.set_dataframe(df)
+
+        fm = QFontMetrics(self.table_widget.font())
+        header_fm = QFontMetrics(self.table_widget.horizontalHeader().font())
+        sample = min(self.WIDTH_SAMPLE_ROWS, self.model.rowCount())
+        for col in range(self.model.columnCount()):
+            header = self.model.headerData(col, Qt.Orientation.Horizontal)
+            width = max([header_fm.horizontalAdvance(header)]
+                        + [fm.horizontalAdvance(self.model.index(row, col).data()) for row in range(sample)])
+            # 加上单元格内边距，限制在 80~200 之间，避免过窄或过宽
+            self.table_widget.setColumnWidth(col, min(max(width + 24, 80), 200))
+
+    def close_connection(self):
+        """关闭 DuckDB 连接（标签页关闭时调用）"""
+        if self.con is not None:
+            self.con.close()
+            self.con = None
 
     def run_query(self):
         """执行 SQL 查询"""
@@ -332,11 +647,7 @@ class ParquetTab(QWidget):
             return
 
         try:
-            import sqlite3
-            conn = sqlite3.connect(':memory:')
-            self.original_df.to_sql('df', conn, index=False, if_exists='replace')
-            result_df = pd.read_sql_query(query, conn)
-            conn.close()
+            result_df = self.con.execute(query).fetch_df()
 
             self.display_data(result_df)
             self.status_label.setText(f"状态: 成功加载 {len(result_df)} 行数据")
@@ -349,54 +660,54 @@ class ParquetTab(QWidget):
             QMessageBox.warning(self, "警告", "没有数据")
             return
 
-        # 在表格末尾插入新行
-        row_count = self.table_widget.rowCount()
-        self.table_widget.insertRow(row_count)
-
-        # 为新行的每一列创建空白单元格（确保可见）
-        for col in range(self.table_widget.columnCount()):
-            item = QTableWidgetItem("")
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            item.setBackground(QColor(255, 251, 235))  # 淡黄色背景，表示新添加
-            self.table_widget.setItem(row_count, col, item)
-
-        # 滚动到新添加的行
-        self.table_widget.scrollToItem(
-            self.table_widget.item(row_count, 0),
-            QTableWidget.ScrollHint.PositionAtBottom
-        )
+        # 在表格末尾插入新行（新行由模型以淡黄色背景显示）；先补齐未加载的行，保证新行在最后
+        with self._batch_updates():
+            self.model.fetch_all()
+            row_count = self.model.rowCount()
+            self.model.insertRow(row_count)
+            index = self.model.index(row_count, 0)
 
-        # 选中新行
-        self.table_widget.selectRow(row_count)
+            # 滚动到新添加的行
+            self.table_widget.scrollTo(index, QTableView.ScrollHint.PositionAtBottom)
 
-        # 设置焦点到第一列，方便用户直接编辑
-        self.table_widget.setCurrentCell(row_count, 0)
+            # 选中新行
+            self.table_widget.selectRow(row_count)
 
-        # 确保新行完全可见 - 调整行高
-        self.table_widget.resizeRowToContents(row_count)
+            # 设置焦点到第一列，方便用户直接编辑
+            self.table_widget.setCurrentIndex(index)
 
         self.status_label.setText(f"状态: 已添加新行 (第 {row_count + 1} 行)，可直接编辑")
 
     def delete_selected(self):
         """删除选中行"""
-        selected_rows = set(item.row() for item in self.table_widget.selectedItems())
+        # 整行选择模式下 selectedRows() 每行只返回一个索引，不必遍历所有选中单元格
+        selected_rows = {index.row() for index in self.table_widget.selectionModel().selectedRows()}
 
         if not selected_rows:
             QMessageBox.information(self, "提示", "请先选择要删除的行")
             return
 
-        for row in sorted(selected_rows, reverse=True):
-            self.table_widget.removeRow(row)
+        # 从后往前按连续区间删除，每段只触发一次 removeRows
+        rows = sorted(selected_rows, reverse=True)
+        with self._batch_updates():
+            start = end = rows[0]
+            for row in rows[1:] + [None]:
+                if row == start - 1:
+                    start = row
+                    continue
+                self.model.removeRows(start, end - start + 1)
+                start = end = row
 
         self.status_label.setText(f"状态: 已删除 {len(selected_rows)} 行")
 
     def reset_view(self):
         """重置视图"""
-        if self.original_df is not None:
-            self.display_data(self.original_df)
+        # 模型从不改动 self.df，它始终与原始 Arrow 表一致
+        if self.df is not None:
+            self.display_data(self.df)
             # 滚动到表格顶部
             self.table_widget.scrollToTop()
-            self.status_label.setText(f"状态: 成功加载 {len(self.original_df)} 行数据")
+            self.status_label.setText(f"状态: 成功加载 {len(self.df)} 行数据")
 
     def save_file(self):
         """保存文件"""
@@ -411,17 +722,11 @@ class ParquetTab(QWidget):
 
         if file_path:
             try:
-                data = {}
-                for col_idx in range(self.table_widget.columnCount()):
-                    col_name = self.table_widget.horizontalHeaderItem(col_idx).text()
-                    col_data = []
-                    for row_idx in range(self.table_widget.rowCount()):
-                        item = self.table_widget.item(row_idx, col_idx)
-                        col_data.append(item.text() if item else '')
-                    data[col_name] = col_data
-
-                df_to_save = pd.DataFrame(data)
-                df_to_save.to_parquet(file_path)
+                # 保留原列类型与 Parquet 字典编码，只写回编辑过的单元格；
+                # 显示的是原始数据时直接基于原始 Arrow 表，省去 pandas -> Arrow 转换
+                base = self._arrow if self.model.source() is self.df else None
+                pq.write_table(self.model.to_arrow(base), file_path,
+                               compression='zstd', use_dictionary=True)
                 QMessageBox.information(self, "成功", "文件保存成功！")
                 self.status_label.setText(f"状态: 已保存到 {os.path.basename(file_path)}")
             except Exception as e:
@@ -554,26 +859,28 @@ class ParquetViewer(QMainWindow):
                 self.tab_widget.setCurrentIndex(i)
                 return
 
-        # 创建新标签页
+        # 创建新标签页并立即显示，数据在后台加载；加载失败时再移除
         tab = ParquetTab()
-        if tab.load_file(file_path):
-            file_name = os.path.basename(file_path)
+        tab.load_failed.connect(lambda _path, tab=tab: self.close_tab(self.tab_widget.indexOf(tab)))
 
-            # 替换空标签
-            current_tab = self.tab_widget.currentWidget()
-            if isinstance(current_tab, ParquetTab) and current_tab.df is None:
-                index = self.tab_widget.currentIndex()
-                self.tab_widget.removeTab(index)
+        # 替换空标签
+        current_tab = self.tab_widget.currentWidget()
+        if isinstance(current_tab, ParquetTab) and current_tab.file_path is None:
+            index = self.tab_widget.currentIndex()
+            self.tab_widget.removeTab(index)
 
-            index = self.tab_widget.addTab(tab, file_name)
-            self.tab_widget.setCurrentIndex(index)
+        index = self.tab_widget.addTab(tab, os.path.basename(file_path))
+        self.tab_widget.setCurrentIndex(index)
+        tab.load_file(file_path)
 
     def close_tab(self, index):
         """关闭标签页"""
-        if self.tab_widget.count() > 1:
-            self.tab_widget.removeTab(index)
-        else:
-            self.tab_widget.removeTab(index)
+        tab = self.tab_widget.widget(index)
+        self.tab_widget.removeTab(index)
+        if isinstance(tab, ParquetTab):
+            tab.close_connection()
+            tab.deleteLater()
+        if self.tab_widget.count() == 0:
             self.new_tab()
 
     def add_recent_file(self, file_path):
@@ -596,8 +903,12 @@ class ParquetViewer(QMainWindow):
         self.settings.setValue("recent_files", self.recent_files)
 
     def closeEvent(self, event):
-        """关闭窗口时保存设置"""
+        """关闭窗口时保存设置并释放各标签页的连接"""
         self.save_settings()
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            if isinstance(tab, ParquetTab):
+                tab.close_connection()
         event.accept()
 
     def dragEnterEvent(self, event: QDragEnterEvent):
@@ -700,24 +1011,24 @@ class ParquetViewer(QMainWindow):
             QLineEdit:focus {
                 border: 1.5px solid #3b82f6;
             }
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 border: 1px solid #e5e7eb;
                 border-radius: 8px;
                 gridline-color: #f0f0f0;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 6px;
                 border: none;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e0f2fe;
                 color: #0c4a6e;
             }
-            QTableWidget::item:alternate {
+            QTableView::item:alternate {
                 background-color: #fafafa;
             }
-            QTableWidget::item:focus {
+            QTableView::item:focus {
                 background-color: #fff7ed;
                 border: 2px solid #3b82f6;
             }
@@ -727,19 +1038,19 @@ class ParquetViewer(QMainWindow):
                 selection-background-color: #3b82f6;
                 selection-color: white;
             }
-            QTableWidget QLineEdit {
+            QTableView QLineEdit {
                 background-color: white;
                 color: #1f2937;
                 border: 2px solid #3b82f6;
                 padding: 2px 4px;
             }
-            QTableWidget QTableCornerButton::section {
+            QTableView QTableCornerButton::section {
                 background-color: #f9fafb;
                 border: none;
                 border-bottom: 1px solid #e5e7eb;
                 border-right: 1px solid #e5e7eb;
             }
-            QTableWidget::verticalHeader {
+            QTableView::verticalHeader {
                 background-color: #f9fafb;
             }
             QHeaderView::section:vertical {
@@ -825,6 +1136,13 @@ def main():
     viewer = ParquetViewer()
     viewer.show()
 
+    # 关闭 PyInstaller onefile 的启动画面（非打包环境无此模块）
+    try:
+        import pyi_splash
+        pyi_splash.close()
+    except ImportError:
+        pass
+
     # 处理命令行参数 - 支持双击 .parquet 打开
     if len(sys.argv) > 1:
         file_path = sys.argv[1]
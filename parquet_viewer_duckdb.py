@@ -1,20 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import csv
+import functools
+import itertools
+import re
 import sys
 import os
+import tempfile
 from pathlib import Path
+from typing import NamedTuple
 
 import duckdb
-from PyQt6.QtCore import Qt, QSettings, QTimer, pyqtSignal
+from PyQt6.QtCore import (
+    Qt, QSettings, QTimer, pyqtSignal, QAbstractTableModel, QModelIndex,
+    QObject, QRunnable, QThreadPool,
+)
 from PyQt6.QtGui import (
     QColor, QFont, QDragEnterEvent, QDropEvent,
     QIcon, QGuiApplication, QCursor, QFontMetrics, QIntValidator,
     QFileOpenEvent,
 )
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableWidget,
-    QTableWidgetItem, QPushButton, QLineEdit, QLabel, QSplitter, QTreeWidget,
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+    QPushButton, QLineEdit, QLabel, QSplitter, QTreeWidget,
     QTreeWidgetItem, QHeaderView, QMessageBox, QFileDialog, QTabWidget,
     QStyledItemDelegate, QMenu
 )
@@ -30,6 +39,11 @@ def resource_path(relative: str) -> str:
     return str(Path.cwd() / relative)
 
 
+def sql_path(path: str) -> str:
+    """路径转成可直接放进 SQL 字符串字面量的形式（统一用 /，单引号转义）"""
+    return Path(path).as_posix().replace("'", "''")
+
+
 def get_base_font() -> QFont:
     """根据平台返回一个合适的基础字体（整体偏大一点，适配 MacBook）"""
     if sys.platform == "darwin":
@@ -41,27 +55,152 @@ def get_base_font() -> QFont:
         # Linux / 其他
         return QFont("Noto Sans CJK SC", 10)
 
+
+class _Fonts(NamedTuple):
+    small: QFont
+    normal: QFont
+    bold: QFont
+    large: QFont
+    header: QFont
+    title: QFont
+
+
+@functools.lru_cache(maxsize=None)
+def _make_fonts(family: str, size: int) -> _Fonts:
+    return _Fonts(
+        small=QFont(family, size - 1),
+        normal=QFont(family, size),
+        bold=QFont(family, size, QFont.Weight.Bold),
+        large=QFont(family, size + 1),
+        header=QFont(family, size + 1, QFont.Weight.DemiBold),
+        title=QFont(family, size + 2, QFont.Weight.Bold),
+    )
+
+
+def tab_fonts() -> _Fonts:
+    """界面用到的几种字号 / 字重，按基础字体只构造一次"""
+    base = get_base_font()
+    return _make_fonts(base.family(), base.pointSize())
+
+# DuckDB 列类型（description 中类型的字符串形式）
+_FLOAT_TYPES = frozenset(("FLOAT", "DOUBLE"))
+_format_float = "{:.6g}".format   # 浮点列统一保留 6 位有效数字
+_INT_TYPES = frozenset((
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "UHUGEINT",
+))
+
+
+DUCKDB_THREADS = min(os.cpu_count() or 4, 8)  # 进程内共享数据库的线程数，超过 8 个收益很小
+# 排序 / 导出超出内存上限时的落盘目录；内存库默认写到当前目录下的 .tmp，安装目录可能不可写
+DUCKDB_TEMP_DIR = os.path.join(tempfile.gettempdir(), "parquet_viewer_duckdb")
+
+_DB: duckdb.DuckDBPyConnection | None = None
+_TAB_IDS = itertools.count(1)
+
+
+def shared_db() -> duckdb.DuckDBPyConnection:
+    """进程内共享的 DuckDB 内存数据库，首次使用时创建"""
+    global _DB
+    if _DB is None:
+        _DB = duckdb.connect()
+        _DB.execute(f"PRAGMA threads={DUCKDB_THREADS};")
+        _DB.execute(f"SET temp_directory = '{sql_path(DUCKDB_TEMP_DIR)}';")
+        # 缓存 parquet 文件尾部元数据，行数 / 列信息 / 翻页查询之间复用
+        _DB.execute("PRAGMA enable_object_cache=true;")
+    return _DB
+
+
+class _FileMeta(NamedTuple):
+    num_rows: int
+    num_row_groups: int
+    desc: list[tuple]                          # DESCRIBE t 的结果
+    col_sizes: dict[str, tuple[int, int]]      # 顶层列名 -> (压缩后, 未压缩) 字节数
+
+
+# 文件元数据缓存：(路径, 大小, 修改时间) -> _FileMeta
+_META_CACHE: dict[tuple[str, int, float], _FileMeta] = {}
+
+# 语句末尾的 LIMIT n [OFFSET m]
+_LIMIT_RE = re.compile(r"\s*\bLIMIT\s+(\d+)(?:\s+OFFSET\s+\d+)?\s*$", re.IGNORECASE)
+# 找最外层 ORDER BY 用到的记号：引号内的整段文本、括号、ORDER BY 关键字
+_ORDER_TOKEN_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[()]|\bORDER\s+BY\b", re.IGNORECASE)
+
+
+def _strip_order_by(sql: str) -> str:
+    """去掉最外层的 ORDER BY 子句（任意层括号内的子查询、窗口函数以及字符串里的都不动）"""
+    depth, cut = 0, None
+    for m in _ORDER_TOKEN_RE.finditer(sql):
+        tok = m.group()
+        if tok == "(":
+            depth += 1
+        elif tok == ")":
+            depth -= 1
+        elif depth == 0 and tok[0] not in "'\"":
+            cut = m.start()
+    return (sql[:cut] if cut is not None else sql).strip()
+
+
+# 翻页查询：基础 SQL 以子查询形式填入 {}，页大小与偏移量作为参数传入
+_PAGE_SQL = "SELECT * FROM ({}) LIMIT ? OFFSET ?"
+
+# 按正负着色的列名（小写）
+_PCT_NAMES = frozenset(("change", "change_rate", "pct", "pct_chg"))
+
+
+def is_numeric_type(type_name: str) -> bool:
+    return type_name in _FLOAT_TYPES or type_name in _INT_TYPES or type_name.startswith("DECIMAL")
+
+# =====================================================================
+# 后台执行 DuckDB 操作
+# =====================================================================
+
+class WorkerSignals(QObject):
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class SqlWorker(QRunnable):
+    """
+    在线程池里用独立游标执行 fn(cursor)，结果 / 错误通过信号交回 GUI 线程；游标由调用方创建，
+    执行完关闭。keep_open=True 时结果还要继续读这个游标（大页面剩余行），成功后不关闭
+    """
+
+    def __init__(self, cursor: duckdb.DuckDBPyConnection, fn, keep_open: bool = False):
+        super().__init__()
+        self.cursor = cursor
+        self.fn = fn
+        self.keep_open = keep_open
+        self.signals = WorkerSignals()
+
+    def run(self):
+        ok = False
+        try:
+            result = self.fn(self.cursor)
+            ok = True
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.done.emit(result)
+        finally:
+            # 成败只取决于 fn 本身；关闭游标出错不影响已经报告的结果
+            if not (ok and self.keep_open):
+                try:
+                    self.cursor.close()
+                except duckdb.Error:
+                    pass
+
 # =====================================================================
 # 让编辑框更清晰的委托
 # =====================================================================
 
 class StrongEditorDelegate(QStyledItemDelegate):
-    """为 QTableWidget 提供更醒目的编辑器（白底、深色字、粗蓝边框、进入时全选）"""
+    """为表格提供更醒目的编辑器（白底、深色字、粗蓝边框、进入时全选）"""
 
     def createEditor(self, parent, option, index):
         editor = QLineEdit(parent)
-        editor.setFont(get_base_font())
-        editor.setStyleSheet("""
-            QLineEdit {
-                background: #ffffff;
-                color: #111827;
-                border: 2px solid #2563eb;
-                border-radius: 6px;
-                padding: 4px 6px;
-                selection-background-color: #2563eb;
-                selection-color: #ffffff;
-            }
-        """)
+        editor.setFont(tab_fonts().normal)
+        editor.setObjectName("cellEditor")   # 样式见 _QSS 中的 QLineEdit#cellEditor
         editor.setFrame(True)
         return editor
 
@@ -69,6 +208,234 @@ class StrongEditorDelegate(QStyledItemDelegate):
         super().setEditorData(editor, index)
         editor.selectAll()
 
+    def initStyleOption(self, option, index):
+        # 所有单元格统一居中：在绘制时设置，不必给每个 item 调 setTextAlignment
+        super().initStyleOption(option, index)
+        option.displayAlignment = Qt.AlignmentFlag.AlignCenter
+
+# =====================================================================
+# 表格模型：一页查询结果按列保存，视图只为可见单元格调用 data()
+# =====================================================================
+
+class PageTableModel(QAbstractTableModel):
+    """
+    当前页数据的表格模型：
+    - 数据按列保存（values[列][行]），显示文本在 data() 中按需格式化
+    - 大页面由 more（保留着剩余结果的游标）分批取行，视图滚动到底部时才追加（fetchMore）
+    - 编辑、新增、删除行只记录在模型里，不改动查询结果
+    """
+
+    LAZY_THRESHOLD = 5000    # 页大小超过该值时按需分批取行
+    FETCH_ROWS = 1000        # 每批从查询结果取回的行数
+    DICT_SAMPLE = 1000       # 字符串列按前若干行判断是否重复值多（不同值不超过一半）
+
+    COLOR_UP = QColor(220, 38, 38)                # 正数：红
+    COLOR_DOWN = QColor(22, 163, 74)              # 负数：绿
+    NEW_ROW_BACKGROUND = QColor(255, 255, 255)    # 新增行：白底
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._columns: list[str] = []
+        self._values: list = []          # 列号 -> 该列的值序列
+        self._fmts: list = []            # 列号 -> 该列的显示格式化函数（按类型在 set_page 时选好）
+        self._colored: frozenset = frozenset()   # 需要着色的列号（数值型且列名在 _PCT_NAMES 中）
+        self._rows: list[int] = []       # 视图行 -> 源数据行号；新增行用负数编号
+        self._next_new = -1
+        self._edits: dict = {}           # (源行号, 列号) -> 编辑后的文本
+        self._sort_index: int | None = None
+        self._sort_arrow = ""
+        self._more = None                # 大页面剩余行所在的游标；取完、换页时关闭
+        self._memos: dict = {}           # 字典化的字符串列：列号 -> {文本: 共用的 str}
+
+    def set_page(self, columns, types, values, more=None):
+        """
+        替换整页数据（一次模型重置）；more 为还有剩余行的游标，由模型接管并负责关闭，
+        此时 values 须为可追加的列表
+        """
+        self.beginResetModel()
+        self._release_more()
+        self._columns = list(columns)
+        self._values = values
+        self._more = more
+        # 重复值多的字符串列做字典化：相同文本共用一个 str 对象，其余副本随即释放
+        self._memos = {}
+        for j, t in enumerate(types):
+            sample = values[j][:self.DICT_SAMPLE] if t == "VARCHAR" else ()
+            if sample and len(set(sample)) * 2 <= len(sample):
+                memo = self._memos[j] = {}
+                values[j] = [memo.setdefault(v, v) for v in values[j]]
+        self._fmts = [_format_float if t in _FLOAT_TYPES else str for t in types]
+        self._colored = frozenset(
+            j for j, (c, t) in enumerate(zip(columns, types))
+            if c.lower() in _PCT_NAMES and is_numeric_type(t)
+        )
+        self._rows = list(range(len(values[0]) if values else 0))
+        self._next_new = -1
+        self._edits = {}
+        self._sort_index = None
+        self.endResetModel()
+
+    def clear_rows(self):
+        """释放当前页的数据（连同剩余行所在的游标），保留列（表头与列宽不变）"""
+        self._release_more()
+        if not self._rows:
+            return
+        self.beginRemoveRows(QModelIndex(), 0, len(self._rows) - 1)
+        self._values = [() for _ in self._columns]
+        self._memos = {}
+        self._rows = []
+        self._edits = {}
+        self.endRemoveRows()
+
+    def columns(self) -> list[str]:
+        return self._columns
+
+    def set_sort_indicator(self, index: int | None, ascending: bool = True):
+        """在表头文字后显示排序小三角；只通知箭头变化的旧列和新列"""
+        arrow = "▲" if ascending else "▼"
+        old = self._sort_index
+        if index == old and (index is None or arrow == self._sort_arrow):
+            return
+        self._sort_index = index
+        self._sort_arrow = arrow
+        for section in {old, index} - {None}:
+            self.headerDataChanged.emit(Qt.Orientation.Horizontal, section, section)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._more is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        """视图滚动到底部时从查询结果再取一批行"""
+        self._fetch(self.FETCH_ROWS)
+
+    def fetch_all(self):
+        """取回本页剩余全部行（新增行、导出当前页前调用，保证行序与完整性）"""
+        while self._more is not None:
+            self._fetch(self.LAZY_THRESHOLD)
+
+    def _release_more(self):
+        if self._more is not None:
+            self._more.close()
+            self._more = None
+
+    def _fetch(self, count):
+        if self._more is None:
+            return
+        rows = self._more.fetchmany(count)
+        if len(rows) < count:
+            self._release_more()
+        if not rows:
+            return
+        first, src = len(self._rows), len(self._values[0])
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for j, (col, new) in enumerate(zip(self._values, zip(*rows))):
+            memo = self._memos.get(j)
+            col.extend(new if memo is None else [memo.setdefault(v, v) for v in new])
+        self._rows.extend(range(src, src + len(rows)))
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            if section == self._sort_index:
+                return f"{self._columns[section]} {self._sort_arrow}"
+            return self._columns[section]
+        return str(section + 1)
+
+    def text(self, row: int, col: int) -> str:
+        key = self._rows[row]
+        if (key, col) in self._edits:
+            return self._edits[(key, col)]
+        if key < 0:
+            return ""
+        val = self._values[col][key]
+        if val is None:
+            return ""
+        return self._fmts[col](val)
+
+    def _sign(self, row: int, col: int) -> int:
+        key = self._rows[row]
+        if (key, col) in self._edits or key < 0:
+            try:
+                val = float(self.text(row, col))
+            except ValueError:
+                return 0
+        else:
+            val = self._values[col][key]
+            if val is None:
+                return 0
+        return (val > 0) - (val < 0)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.text(row, col)
+
+        if role == Qt.ItemDataRole.ForegroundRole and col in self._colored:
+            sign = self._sign(row, col)
+            if sign > 0:
+                return self.COLOR_UP
+            if sign < 0:
+                return self.COLOR_DOWN
+            return None
+
+        if role == Qt.ItemDataRole.BackgroundRole and self._rows[row] < 0:
+            return self.NEW_ROW_BACKGROUND
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return (Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+                | Qt.ItemFlag.ItemIsEditable)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        key = self._rows[index.row()]
+        self._edits[(key, index.column())] = "" if value is None else str(value)
+        self.dataChanged.emit(index, index)
+        return True
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        self.beginInsertRows(parent, row, row + count - 1)
+        self._rows[row:row] = range(self._next_new, self._next_new - count, -1)
+        self._next_new -= count
+        self.endInsertRows()
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        self.beginRemoveRows(parent, row, row + count - 1)
+        del self._rows[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    def remove_rows(self, rows):
+        """
+        一次删除多行（任意行号集合）：连续的一段走 removeRows（只发一次行删除通知，
+        视图保留滚动位置与其余选择）；不连续时 O(N) 重建行列表，只重置一次模型
+        """
+        drop = set(rows)
+        if not drop:
+            return
+        first = min(drop)
+        if max(drop) - first + 1 == len(drop):
+            self.removeRows(first, len(drop))
+            return
+        self.beginResetModel()
+        self._rows = [key for i, key in enumerate(self._rows) if i not in drop]
+        self.endResetModel()
+
 # =====================================================================
 # 单个 Parquet 标签页
 # =====================================================================
@@ -81,8 +448,10 @@ class ParquetTab(QWidget):
 
         self.file_path: str | None = None
         self.con: duckdb.DuckDBPyConnection | None = None
-        self.table_cache = None
+        self._schema = ""   # 本标签在共享数据库中的 schema
         self.columns: list[str] = []
+        self.file_desc: list[tuple] = []   # 文件的 DESCRIBE 结果（列名, 类型, ...）
+        self._col_sizes: dict[str, tuple[int, int]] = {}   # 各列 (压缩后, 未压缩) 字节数
         self.current_sql = "SELECT * FROM t LIMIT 100"
 
         # 分页相关
@@ -91,22 +460,42 @@ class ParquetTab(QWidget):
         self.total_rows = 0
         self.total_pages = 1
         self.base_sql = "SELECT * FROM t"
+        self._shown_key: tuple | None = None   # 最近一次成功显示的页：(基础查询, 每页行数, 页码)
+        self._row_counts: dict[str, int] = {}  # 基础查询 -> 总行数
         self.prev_btn: QPushButton | None = None
         self.next_btn: QPushButton | None = None
+        self.save_btn: QPushButton | None = None
         self.page_input: QLineEdit | None = None
         self.page_size_input: QLineEdit | None = None
 
         # 排序相关
         self.sort_column: str | None = None
         self.sort_order = Qt.SortOrder.AscendingOrder
-        self.base_header_labels: list[str] = []
+
+        # 上次测量列宽时的 (列名, 行数)，不变时不再重新测量
+        self._width_key: tuple | None = None
+        self._unsized: set[int] = set()   # 还没测量过列宽的列号（宽表按可见区域逐步测量）
 
         # Qt 控件占位
         self.file_info_label: QLabel | None = None
         self.tree_widget: QTreeWidget | None = None
         self.sql_input: QLineEdit | None = None
         self.status_label: QLabel | None = None
-        self.table_widget: QTableWidget | None = None
+        self.table_widget: QTableView | None = None
+        self.model: PageTableModel | None = None
+        self._export_worker: SqlWorker | None = None
+        self._save_worker: SqlWorker | None = None
+        self._load_worker: SqlWorker | None = None
+        self._prefetch_worker: SqlWorker | None = None
+        self._page_worker: SqlWorker | None = None
+        self._count_worker: SqlWorker | None = None
+        self._prefetched = None   # ((base_sql, page_size, page), description, rows)
+
+        # 连续翻页 / 改每页行数 / 点表头排序时，只查询最后一次操作对应的页
+        self._nav_timer = QTimer(self)
+        self._nav_timer.setSingleShot(True)
+        self._nav_timer.setInterval(50)
+        self._nav_timer.timeout.connect(self._flush_refresh)
 
         self.init_ui()
         if file_path:
@@ -140,7 +529,7 @@ class ParquetTab(QWidget):
         v.setContentsMargins(0, 0, 0, 0)
         v.setSpacing(0)
 
-        base_font = get_base_font()
+        fonts = tab_fonts()
 
         # 顶部标题 + 文件信息卡片
         title_widget = QWidget()
@@ -150,8 +539,7 @@ class ParquetTab(QWidget):
         tlay.setSpacing(8)
 
         title_label = QLabel("文件结构")
-        title_font = QFont(base_font.family(), base_font.pointSize() + 2, QFont.Weight.Bold)
-        title_label.setFont(title_font)
+        title_label.setFont(fonts.title)
         tlay.addWidget(title_label)
 
         info_card = QWidget()
@@ -161,8 +549,7 @@ class ParquetTab(QWidget):
         iclay.setSpacing(4)
 
         self.file_info_label = QLabel("未加载文件")
-        info_font = QFont(base_font.family(), base_font.pointSize())
-        self.file_info_label.setFont(info_font)
+        self.file_info_label.setFont(fonts.normal)
         self.file_info_label.setWordWrap(True)
         self.file_info_label.setStyleSheet("color: #6b7280;")
         iclay.addWidget(self.file_info_label)
@@ -172,16 +559,14 @@ class ParquetTab(QWidget):
 
         # 列信息树
         self.tree_widget = QTreeWidget()
-        item_font = QFont(base_font.family(), base_font.pointSize() + 1)
-        header_font = QFont(base_font.family(), base_font.pointSize() + 1, QFont.Weight.DemiBold)
 
-        self.tree_widget.setFont(item_font)
+        self.tree_widget.setFont(fonts.large)
         self.tree_widget.setHeaderLabels(["名称 (Name)", "类型 (Type)"])
 
         header_item = self.tree_widget.headerItem()
         if header_item is not None:
-            header_item.setFont(0, header_font)
-            header_item.setFont(1, header_font)
+            header_item.setFont(0, fonts.header)
+            header_item.setFont(1, fonts.header)
 
         self.tree_widget.setColumnWidth(0, 150)
         self.tree_widget.setIndentation(15)
@@ -190,7 +575,7 @@ class ParquetTab(QWidget):
         return left
 
     def create_right_panel(self) -> QWidget:
-        base_font = get_base_font()
+        fonts = tab_fonts()
         right = QWidget()
         right.setObjectName("rightPanel")
         v = QVBoxLayout(right)
@@ -204,41 +589,40 @@ class ParquetTab(QWidget):
         hlay.setContentsMargins(20, 12, 20, 12)
         hlay.setSpacing(12)
 
-        btn_font = QFont(base_font.family(), base_font.pointSize())
         btn_style = (
             "padding: 7px 18px; font-size: 10pt; border-radius: 6px; "
             "color: #ffffff; border: none;"
         )
 
         add_btn = QPushButton("➕ 新增行")
-        add_btn.setFont(btn_font)
+        add_btn.setFont(fonts.normal)
         add_btn.setStyleSheet(btn_style + "background-color: #3b82f6;")
         add_btn.clicked.connect(self.add_row)
 
         del_btn = QPushButton("🗑 删除选中")
-        del_btn.setFont(btn_font)
+        del_btn.setFont(fonts.normal)
         del_btn.setStyleSheet(btn_style + "background-color: #ef4444;")
         del_btn.clicked.connect(self.delete_selected)
 
         reset_btn = QPushButton("🔄 重置视图")
-        reset_btn.setFont(btn_font)
+        reset_btn.setFont(fonts.normal)
         reset_btn.setStyleSheet(btn_style + "background-color: #6b7280;")
         reset_btn.clicked.connect(self.reset_view)
 
         export_csv_btn = QPushButton("📥 导出 CSV")
-        export_csv_btn.setFont(btn_font)
+        export_csv_btn.setFont(fonts.normal)
         export_csv_btn.setStyleSheet(btn_style + "background-color: #8b5cf6;")
         csv_menu = QMenu(self)
         csv_menu.addAction("导出当前页", self.export_current_page_csv)
         csv_menu.addAction("导出全部数据", self.export_all_csv)
         export_csv_btn.setMenu(csv_menu)
 
-        save_btn = QPushButton("💾 保存为 Parquet")
-        save_btn.setFont(btn_font)
-        save_btn.setStyleSheet(btn_style + "background-color: #059669;")
-        save_btn.clicked.connect(self.save_file)
+        self.save_btn = QPushButton("💾 保存为 Parquet")
+        self.save_btn.setFont(fonts.normal)
+        self.save_btn.setStyleSheet(btn_style + "background-color: #059669;")
+        self.save_btn.clicked.connect(self.save_file)
 
-        for b in (add_btn, del_btn, reset_btn, export_csv_btn, save_btn):
+        for b in (add_btn, del_btn, reset_btn, export_csv_btn, self.save_btn):
             hlay.addWidget(b)
         hlay.addStretch()
         v.addWidget(toolbar)
@@ -251,7 +635,7 @@ class ParquetTab(QWidget):
         c.setSpacing(10)
 
         sql_label = QLabel("SQL:")
-        sql_label.setFont(QFont(base_font.family(), base_font.pointSize(), QFont.Weight.Bold))
+        sql_label.setFont(fonts.bold)
         sql_label.setStyleSheet("color: #374151;")
         c.addWidget(sql_label)
 
@@ -264,14 +648,14 @@ class ParquetTab(QWidget):
         )
         self.sql_input.setText("SELECT * FROM t LIMIT 100")
         self.sql_input.setMinimumHeight(38)
-        self.sql_input.setFont(QFont(base_font.family(), base_font.pointSize() + 1))
+        self.sql_input.setFont(fonts.large)
         self.sql_input.returnPressed.connect(self.run_query)
         sql_line.addWidget(self.sql_input)
 
         run_btn = QPushButton("▶ 运行")
         run_btn.setMinimumWidth(90)
         run_btn.setMinimumHeight(38)
-        run_btn.setFont(btn_font)
+        run_btn.setFont(fonts.normal)
         run_btn.setStyleSheet(
             "font-size: 10pt; padding: 0 24px; font-weight: 600; "
             "border-radius: 6px; background-color: #3b82f6; color: white;"
@@ -281,7 +665,7 @@ class ParquetTab(QWidget):
         c.addLayout(sql_line)
 
         self.status_label = QLabel("状态: 就绪")
-        self.status_label.setFont(QFont(base_font.family(), base_font.pointSize() - 1))
+        self.status_label.setFont(fonts.small)
         self.status_label.setStyleSheet("color: #6b7280; padding: 3px 0;")
         c.addWidget(self.status_label)
 
@@ -290,14 +674,14 @@ class ParquetTab(QWidget):
         pager_line.setSpacing(10)
 
         size_label = QLabel("每页行数:")
-        size_label.setFont(QFont(base_font.family(), base_font.pointSize() - 1))
+        size_label.setFont(fonts.small)
         size_label.setStyleSheet("color: #6b7280;")
         pager_line.addWidget(size_label)
 
         self.page_size_input = QLineEdit()
         self.page_size_input.setFixedWidth(70)
         self.page_size_input.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.page_size_input.setFont(QFont(base_font.family(), base_font.pointSize()))
+        self.page_size_input.setFont(fonts.normal)
         self.page_size_input.setValidator(QIntValidator(1, 100000, self))
         self.page_size_input.setText(str(self.page_size))
         self.page_size_input.returnPressed.connect(self.on_page_size_changed)
@@ -307,7 +691,7 @@ class ParquetTab(QWidget):
 
         self.prev_btn = QPushButton("⟨")
         self.prev_btn.setFixedSize(32, 26)
-        self.prev_btn.setFont(QFont(base_font.family(), base_font.pointSize()))
+        self.prev_btn.setFont(fonts.normal)
         self.prev_btn.clicked.connect(self.prev_page)
         pager_line.addWidget(self.prev_btn)
 
@@ -315,35 +699,43 @@ class ParquetTab(QWidget):
         self.page_input.setPlaceholderText("页")
         self.page_input.setFixedWidth(80)
         self.page_input.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.page_input.setFont(QFont(base_font.family(), base_font.pointSize()))
+        self.page_input.setFont(fonts.normal)
         self.page_input.returnPressed.connect(self.goto_page)
         pager_line.addWidget(self.page_input)
 
         self.next_btn = QPushButton("⟩")
         self.next_btn.setFixedSize(32, 26)
-        self.next_btn.setFont(QFont(base_font.family(), base_font.pointSize()))
+        self.next_btn.setFont(fonts.normal)
         self.next_btn.clicked.connect(self.next_page)
         pager_line.addWidget(self.next_btn)
 
         c.addLayout(pager_line)
 
-        # 数据表
-        self.table_widget = QTableWidget()
-        table_font = QFont(base_font.family(), base_font.pointSize() + 1)
-        self.table_widget.setFont(table_font)
+        # 数据表（模型/视图：只为可见单元格取数据，不再每格创建 QTableWidgetItem）
+        self.model = PageTableModel(self)
+        self.table_widget = QTableView()
+        self.table_widget.setModel(self.model)
+        self.table_widget.setFont(fonts.large)
         self.table_widget.setAlternatingRowColors(True)
-        self.table_widget.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table_widget.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.table_widget.verticalHeader().setDefaultSectionSize(36)
         self.table_widget.verticalHeader().setMinimumSectionSize(30)
+        # 行高统一用默认值，换页 / 增删行时不再逐行计算行高
+        self.table_widget.verticalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.Fixed
+        )
         self.table_widget.setEditTriggers(
-            QTableWidget.EditTrigger.DoubleClicked
-            | QTableWidget.EditTrigger.EditKeyPressed
-            | QTableWidget.EditTrigger.AnyKeyPressed
+            QTableView.EditTrigger.DoubleClicked
+            | QTableView.EditTrigger.EditKeyPressed
+            | QTableView.EditTrigger.AnyKeyPressed
         )
         self.table_widget.horizontalHeader().setSectionResizeMode(
             QHeaderView.ResizeMode.Interactive
         )
         self.table_widget.horizontalHeader().setStretchLastSection(True)
+        hbar = self.table_widget.horizontalScrollBar()
+        hbar.valueChanged.connect(self._size_visible_columns)
+        hbar.rangeChanged.connect(self._size_visible_columns)   # 视图宽度变化时滚动范围随之变化
         self.table_widget.verticalHeader().setVisible(True)
         self.table_widget.verticalHeader().setDefaultAlignment(
             Qt.AlignmentFlag.AlignCenter
@@ -365,11 +757,45 @@ class ParquetTab(QWidget):
     # ------------------------------------------------------------------
 
     def _ensure_con(self):
+        """
+        各标签共用进程内同一个 DuckDB 数据库（共享缓冲池与 parquet 元数据缓存），
+        每个标签一个游标 + 自己的 schema，视图 t 建在其中，SQL 里照常写 t
+        """
         if self.con is None:
-            self.con = duckdb.connect()
-            self.con.execute("PRAGMA threads=4;")
+            self._schema = f"tab_{next(_TAB_IDS)}"
+            shared_db().execute(f"CREATE SCHEMA IF NOT EXISTS {self._schema}")
+            self.con = self._cursor()
+
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        共享数据库上的新游标，默认 schema 指向本标签（后台任务用它查询 t）；
+        直接从共享数据库派生，关闭本标签的游标不会打断仍在运行的后台任务
+        """
+        cur = shared_db().cursor()
+        cur.execute(f"SET schema = '{self._schema}'")
+        return cur
+
+    def is_busy(self) -> bool:
+        """保存 / 导出全部仍在进行（它们读取本标签的视图 t，期间不能删除 schema）"""
+        return self._save_worker is not None or self._export_worker is not None
+
+    def close_connection(self):
+        """关闭本标签的游标并删除它的 schema（共享数据库保持打开）；调用前应确认 is_busy() 为 False"""
+        if self.con is None:
+            return
+        # 丢弃所有未返回的后台结果，已关闭的标签不再弹出加载 / 查询提示
+        self._prefetched = self._prefetch_worker = self._page_worker = self._count_worker = None
+        self._load_worker = None
+        self.model.clear_rows()
+        self.con.close()
+        self.con = None
+        shared_db().execute(f"DROP SCHEMA IF EXISTS {self._schema} CASCADE")
 
     def load_file(self, file_path: str) -> bool:
+        """
+        建视图后把行数、列信息和首页查询交给线程池（独立游标），界面不卡；
+        结果在 _on_loaded 中回到 GUI 线程显示
+        """
         try:
             file_path = os.path.abspath(file_path)
             if not os.path.exists(file_path):
@@ -378,65 +804,120 @@ class ParquetTab(QWidget):
             self._ensure_con()
             self.file_path = file_path
 
-            self.con.execute("DROP VIEW IF EXISTS t;")
-            norm_path = file_path.replace("\\", "/")
+            # CREATE VIEW 不支持参数绑定，路径只能转义后拼进语句；其余语句路径都作为参数传入
             self.con.execute(
-                f"CREATE VIEW t AS SELECT * FROM parquet_scan('{norm_path}');"
+                f"CREATE OR REPLACE VIEW t AS SELECT * FROM read_parquet('{sql_path(file_path)}');"
             )
+            stat = os.stat(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"无法打开文件:\n{e}")
+            return False
 
-            meta = self.con.execute("SELECT * FROM t LIMIT 1")
-            self.columns = [desc[0] for desc in meta.description] if meta.description else []
+        page_size = 100
+
+        def load(cur):
+            # 同一文件（大小与修改时间未变）重复打开时复用行数和列信息
+            key = (file_path, stat.st_size, stat.st_mtime)
+            meta = _META_CACHE.get(key)
+            if meta is None:
+                # 行数、行组和各列大小都只读文件尾部元数据，不扫描数据页
+                num_rows, num_row_groups = cur.execute(
+                    "SELECT num_rows, num_row_groups FROM parquet_file_metadata(?)", (file_path,)
+                ).fetchone()
+                col_sizes = {}
+                for path, comp, raw in cur.execute(
+                    "SELECT path_in_schema, total_compressed_size, total_uncompressed_size "
+                    "FROM parquet_metadata(?)", (file_path,)
+                ).fetchall():
+                    # 嵌套列的 path_in_schema 为 "a, b"，按顶层列汇总各行组
+                    name = path.split(", ", 1)[0]
+                    c, u = col_sizes.get(name, (0, 0))
+                    col_sizes[name] = (c + comp, u + raw)
+                meta = _META_CACHE[key] = _FileMeta(
+                    num_rows, num_row_groups, cur.execute("DESCRIBE t").fetchall(), col_sizes
+                )
+            res = cur.execute("SELECT * FROM t LIMIT ?", (page_size,))
+            return meta, res.description or [], res.fetchall()
 
-            size_mb = os.path.getsize(file_path) / 1024 / 1024
-            self.base_sql = "SELECT * FROM t"
-            self.page_size = 100
-            self.current_page = 1
-            self.total_rows = self.con.execute("SELECT COUNT(*) FROM t").fetchone()[0]
-
-            file_name = os.path.basename(file_path)
-            self.file_info_label.setText(
-                f"文件: {file_name}\n"
-                f"大小: {size_mb:.2f} MB\n"
-                f"行数: {self.total_rows}\n"
-                f"列数: {len(self.columns)}"
-            )
+        worker = SqlWorker(self._cursor(), load)
+        worker.signals.done.connect(
+            lambda result: self._on_loaded(worker, stat.st_size, page_size, *result)
+        )
+        worker.signals.failed.connect(
+            lambda msg: self._on_load_failed(worker, msg)
+        )
+        self._load_worker = worker
+        self.status_label.setText("状态: 正在加载...")
+        QThreadPool.globalInstance().start(worker)
+        return True
 
-            if self.page_size_input:
-                self.page_size_input.setText(str(self.page_size))
+    def _on_loaded(self, worker, size: int, page_size: int, meta, desc, rows):
+        if worker is not self._load_worker:   # 期间又打开了别的文件
+            return
+        self._load_worker = None
+        self.total_rows, self.file_desc = meta.num_rows, meta.desc
+        self._col_sizes = meta.col_sizes
+        self._row_counts = {"SELECT * FROM t": self.total_rows}
+        self._count_worker = None
+        self.sort_column = None
+        self.columns = [d[0] for d in self.file_desc]
+
+        # 视图按名字引用 t，换文件后 SQL 不变也无需重建，但预取的旧文件数据要丢弃
+        self._prefetched = self._prefetch_worker = self._page_worker = None
+        self._set_base_sql("SELECT * FROM t")
+        self.page_size = page_size
+        self.current_page = 1
+        self._shown_key = (self.base_sql, page_size, 1)
+        self.current_sql = _PAGE_SQL.format(self.base_sql)
+
+        self.file_info_label.setText(
+            f"文件: {os.path.basename(self.file_path)}\n"
+            f"大小: {size / 1024 / 1024:.2f} MB\n"
+            f"行数: {self.total_rows}\n"
+            f"列数: {len(self.columns)}\n"
+            f"行组: {meta.num_row_groups}"
+        )
 
-            self.update_tree()
-            self.sql_input.setText("SELECT * FROM t LIMIT 100")
-            self._refresh_current_page()
-            self.status_label.setText("状态: 加载成功")
-            return True
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"无法打开文件:\n{e}")
-            return False
+        if self.page_size_input:
+            self.page_size_input.setText(str(self.page_size))
+
+        self.update_tree()
+        self.sql_input.setText(f"SELECT * FROM t LIMIT {page_size}")
+        self._show_rows(desc, rows)
+        self._update_pager_display()
+        self.status_label.setText("状态: 加载成功")
+        self._prefetch_next_page()
+
+    def _on_load_failed(self, worker, msg: str):
+        if worker is not self._load_worker:
+            return
+        self._load_worker = None
+        self.status_label.setText("状态: 加载失败")
+        QMessageBox.critical(self, "错误", f"无法打开文件:\n{msg}")
 
     def update_tree(self):
         self.tree_widget.clear()
         if not self.con:
             return
 
-        base_font = get_base_font()
+        fonts = tab_fonts()
         root = QTreeWidgetItem(self.tree_widget)
         root.setText(0, "数据表")
-        root.setFont(0, QFont(base_font.family(), base_font.pointSize(), QFont.Weight.Bold))
+        root.setFont(0, fonts.bold)
 
         columns_node = QTreeWidgetItem(root)
         columns_node.setText(0, "列 (Columns)")
-        columns_node.setFont(0, QFont(base_font.family(), base_font.pointSize(), QFont.Weight.Bold))
+        columns_node.setFont(0, fonts.bold)
 
-        try:
-            desc = self.con.execute("DESCRIBE t").fetchall()
-            for name, col_type, *_ in desc:
-                item = QTreeWidgetItem(columns_node)
-                item.setText(0, name)
-                item.setText(1, col_type)
-        except Exception as e:
+        for name, col_type, *_ in self.file_desc:
             item = QTreeWidgetItem(columns_node)
-            item.setText(0, "无法获取列信息")
-            item.setText(1, str(e))
+            item.setText(0, name)
+            item.setText(1, col_type)
+            sizes = self._col_sizes.get(name)
+            if sizes:
+                tip = f"压缩后 {sizes[0] / 1024 / 1024:.2f} MB / 未压缩 {sizes[1] / 1024 / 1024:.2f} MB"
+                item.setToolTip(0, tip)
+                item.setToolTip(1, tip)
 
         self.tree_widget.expandAll()
 
@@ -450,40 +931,72 @@ class ParquetTab(QWidget):
             self.current_page = self.total_pages
 
         if self.page_input:
-            self.page_input.setText(f"{self.current_page}/{self.total_pages}")
+            total = "…" if self._count_worker else self.total_pages
+            self.page_input.setText(f"{self.current_page}/{total}")
 
         if self.prev_btn:
             self.prev_btn.setEnabled(self.current_page > 1)
         if self.next_btn:
             self.next_btn.setEnabled(self.current_page < self.total_pages)
 
+    def _set_base_sql(self, base_sql: str):
+        """
+        切换基础查询（页查询与计数都在后台游标上以子查询形式执行，SQL 有误时由页查询报错，
+        见 _on_page_failed）；查询变了时丢弃为旧查询预取的页
+        """
+        if base_sql != self.base_sql:
+            self._prefetched = self._prefetch_worker = None
+        self.base_sql = base_sql
+
     def _recount_total_rows(self):
-        try:
-            count_sql = f"SELECT COUNT(*) FROM ({self.base_sql}) sub"
-            self.total_rows = self.con.execute(count_sql).fetchone()[0]
-        except Exception:
-            self.total_rows = self.table_widget.rowCount()
+        """
+        总行数按基础查询（去掉末尾 ORDER BY）缓存：文件内容不变，
+        重置视图、改每页行数、表头排序都不再重新 COUNT；换文件时清空。
+        整表行数在打开文件时取自 parquet 元数据；其他查询未命中缓存时在线程池里
+        COUNT，首页先显示，计数完成前页码按一页处理
+        """
+        key = _strip_order_by(self.base_sql)
+        self._count_worker = None
+        cached = self._row_counts.get(key)
+        if cached is not None:
+            self.total_rows = cached
+            return
+        self.total_rows = self.page_size
+
+        def count(cur):
+            return cur.execute(f"SELECT COUNT(*) FROM ({key})").fetchone()[0]
+
+        worker = self._count_worker = SqlWorker(self._cursor(), count)
+        worker.signals.done.connect(lambda total: self._on_counted(worker, key, total))
+        worker.signals.failed.connect(lambda _msg: self._on_counted(worker, key, None))
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_counted(self, worker, key: str, total):
+        if worker is not self._count_worker:   # 期间换了查询或文件
+            return
+        self._count_worker = None
+        if total is None:
+            self.total_rows = self.model.rowCount()
+        else:
+            self.total_rows = self._row_counts[key] = total
+        self._update_pager_display()
+        if self._page_worker is None:
+            self.status_label.setText(self._page_status())
+            if self._prefetched is None:
+                self._prefetch_next_page()
 
     def _prepare_base_sql_from_input(self):
         text = self.sql_input.text().strip().rstrip(";")
         if not text:
             text = "SELECT * FROM t"
 
-        tokens = text.split()
-        uppers = [t.upper() for t in tokens]
         page_size = self.page_size
+        m = _LIMIT_RE.search(text)
+        if m:
+            page_size = int(m.group(1))
+            text = text[:m.start()]
 
-        if "LIMIT" in uppers:
-            idx = uppers.index("LIMIT")
-            if idx + 1 < len(tokens):
-                try:
-                    page_size = int(tokens[idx + 1])
-                except ValueError:
-                    pass
-            tokens = tokens[:idx]
-            text = " ".join(tokens)
-
-        self.base_sql = text.strip() or "SELECT * FROM t"
+        self._set_base_sql(text.strip() or "SELECT * FROM t")
         self.page_size = max(1, page_size)
         if self.page_size_input:
             self.page_size_input.setText(str(self.page_size))
@@ -491,12 +1004,112 @@ class ParquetTab(QWidget):
     def _refresh_current_page(self):
         if not self.con:
             return
-        offset = (self.current_page - 1) * self.page_size
-        page_sql = f"SELECT * FROM ({self.base_sql}) sub LIMIT {self.page_size} OFFSET {offset}"
-        self.current_sql = page_sql
-        self.run_sql_to_table(page_sql)
+        self._nav_timer.stop()
+        self._page_worker = None   # 尚未返回的上一次页查询作废
+        self.current_sql = _PAGE_SQL.format(self.base_sql)
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched and prefetched[0] == (self.base_sql, self.page_size, self.current_page):
+            self._show_page(*prefetched[1:])
+        else:
+            # 查询与结果转换都在线程池里做，界面线程只负责显示
+            worker = self._page_worker = self._page_fetch_worker(self.current_page)
+            worker.signals.done.connect(lambda result: self._on_page_fetched(worker, result))
+            worker.signals.failed.connect(lambda msg: self._on_page_failed(worker, msg))
+            self._update_pager_display()
+            self.status_label.setText(f"状态: 正在查询第 {self.current_page} 页...")
+            QThreadPool.globalInstance().start(worker)
+
+    def _on_page_fetched(self, worker, result):
+        if worker is not self._page_worker:   # 期间又翻了页或换了查询
+            if result[3] is not None:         # 丢弃的大页面结果：关闭它保留的游标
+                result[3].close()
+            return
+        self._page_worker = None
+        self._show_page(*result[1:])
+
+    def _on_page_failed(self, worker, msg: str):
+        if worker is not self._page_worker:
+            return
+        self._page_worker = None
+        if self._shown_key and self._shown_key[0] != self.base_sql:
+            # 查询有误：回到表格里仍在显示的那一页对应的查询，翻页 / 计数与之保持一致
+            self._set_base_sql(self._shown_key[0])
+            self.page_size, self.current_page = self._shown_key[1:]
+            if self.page_size_input:
+                self.page_size_input.setText(str(self.page_size))
+            self._recount_total_rows()
+            self._update_pager_display()
+        self.status_label.setText("状态: 查询失败")
+        QMessageBox.warning(self, "查询错误", f"SQL 查询失败:\n{msg}")
+
+    def _show_page(self, desc, rows, more=None):
+        # 先释放上一页（只有模型引用它），峰值内存约为一页而不是两页
+        self.model.clear_rows()
+        self._show_rows(desc, rows, more)
+        self._page_shown()
+
+    def _page_shown(self):
+        self._shown_key = (self.base_sql, self.page_size, self.current_page)
         self._update_pager_display()
-        self.status_label.setText(f"状态: 第 {self.current_page} 页查询成功")
+        self.status_label.setText(self._page_status())
+        self._prefetch_next_page()
+
+    def _page_status(self) -> str:
+        if self.sort_column:
+            arrow = "▲" if self.sort_order == Qt.SortOrder.AscendingOrder else "▼"
+            text = f"状态: 按 {self.sort_column} {arrow} 排序，第 {self.current_page} 页 {self.model.rowCount()} 行"
+        else:
+            text = f"状态: 第 {self.current_page} 页查询成功"
+        return text + "，计数中…" if self._count_worker else text
+
+    def _schedule_refresh(self):
+        """页码立即更新，查询延后 50ms；期间的后续操作会合并成一次查询"""
+        self._update_pager_display()
+        self._nav_timer.start()
+
+    def _flush_refresh(self):
+        try:
+            self._refresh_current_page()
+        except Exception as e:
+            QMessageBox.warning(self, "查询错误", f"SQL 查询失败:\n{e}")
+
+    def _prefetch_next_page(self):
+        """后台取好下一页，向后翻页时直接显示（按需分批取行的大页面不预取）"""
+        page = self.current_page + 1
+        if page > self.total_pages or self.page_size > PageTableModel.LAZY_THRESHOLD:
+            return
+        worker = self._page_fetch_worker(page)
+        worker.signals.done.connect(lambda result: self._on_prefetched(worker, result))
+        self._prefetch_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def _page_fetch_worker(self, page: int) -> SqlWorker:
+        """
+        在独立游标上取第 page 页，结果为 ((base_sql, page_size, page), description, rows, more)；
+        大页面只先取第一批行，还有剩余时 more 就是这个游标，交给模型 fetchMore 按需取回并由它关闭
+        """
+        key = (self.base_sql, self.page_size, page)
+        sql = _PAGE_SQL.format(self.base_sql)
+        params = (self.page_size, (page - 1) * self.page_size)
+        lazy = self.page_size > PageTableModel.LAZY_THRESHOLD
+
+        def fetch(cur):
+            res = cur.execute(sql, params)
+            if not lazy:
+                return key, res.description or [], res.fetchall(), None
+            first = res.fetchmany(PageTableModel.FETCH_ROWS)
+            desc = res.description or []
+            if len(first) < PageTableModel.FETCH_ROWS:
+                cur.close()
+                return key, desc, first, None
+            return key, desc, first, cur
+
+        return SqlWorker(self._cursor(), fetch, keep_open=lazy)
+
+    def _on_prefetched(self, worker, result):
+        if worker is self._prefetch_worker:   # 期间换了查询或文件则丢弃
+            self._prefetch_worker = None
+            self._prefetched = result
 
     def on_page_size_changed(self):
         if not self.page_size_input:
@@ -516,20 +1129,17 @@ class ParquetTab(QWidget):
         self.page_size = new_size
         base = self.base_sql.strip() or "SELECT * FROM t"
         self.sql_input.setText(f"{base} LIMIT {self.page_size}")
-        try:
-            self._recount_total_rows()
-            self.current_page = 1
-            self._refresh_current_page()
-        except Exception as e:
-            QMessageBox.warning(self, "错误", f"更新每页行数失败:\n{e}")
-            self.page_size_input.setText(str(self.page_size))
+        self._recount_total_rows()
+        self.current_page = 1
+        self._schedule_refresh()
 
     def run_query(self):
         if not self.con:
             QMessageBox.warning(self, "警告", "没有数据可查询")
             return
-        self._prepare_base_sql_from_input()
         try:
+            self._prepare_base_sql_from_input()
+            self.sort_column = None   # 结果顺序以输入的 SQL 为准
             self._recount_total_rows()
             self.current_page = 1
             self._refresh_current_page()
@@ -541,14 +1151,14 @@ class ParquetTab(QWidget):
             return
         if self.current_page > 1:
             self.current_page -= 1
-            self._refresh_current_page()
+            self._schedule_refresh()
 
     def next_page(self):
         if not self.con or self.total_pages <= 1:
             return
         if self.current_page < self.total_pages:
             self.current_page += 1
-            self._refresh_current_page()
+            self._schedule_refresh()
 
     def goto_page(self):
         if not self.con or self.total_pages <= 1:
@@ -570,128 +1180,112 @@ class ParquetTab(QWidget):
         if page > self.total_pages:
             page = self.total_pages
         self.current_page = page
-        self._refresh_current_page()
+        self._schedule_refresh()
 
     # ------------------------------------------------------------------
     # SQL 执行 & 显示
     # ------------------------------------------------------------------
 
-    def run_sql_to_table(self, sql: str):
-        res = self.con.execute(sql)
-        self.columns = [desc[0] for desc in res.description] if res.description else []
-        rows = [dict(zip(self.columns, row)) for row in res.fetchall()]
-        self.table_cache = rows
-        self.display_data(self.columns, rows)
-
-    def display_data(self, columns, rows):
-        self.table_widget.clear()
-        self.table_widget.setColumnCount(len(columns))
-        self.table_widget.setHorizontalHeaderLabels(columns)
-        self.table_widget.setRowCount(len(rows))
-
-        self.base_header_labels = list(columns)
-        self._update_header_sort_icons(sorted_index=None)
-
-        for i, row in enumerate(rows):
-            for j, col in enumerate(columns):
-                val = row.get(col, None)
-                if val is None:
-                    s = ""
-                elif isinstance(val, float):
-                    s = f"{val:.6g}"
-                else:
-                    s = str(val)
-                item = QTableWidgetItem(s)
-
-                if col.lower() in ("change", "change_rate", "pct", "pct_chg"):
-                    try:
-                        fv = float(s)
-                        if fv > 0:
-                            item.setForeground(QColor(220, 38, 38))
-                        elif fv < 0:
-                            item.setForeground(QColor(22, 163, 74))
-                    except Exception:
-                        pass
-
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.table_widget.setItem(i, j, item)
-
-        font = self.table_widget.font()
-        fm = QFontMetrics(font)
-        header_font = self.table_widget.horizontalHeader().font()
-        header_fm = QFontMetrics(header_font)
-
-        for c in range(self.table_widget.columnCount()):
-            header_text = self.table_widget.horizontalHeaderItem(c).text()
-            header_width = header_fm.horizontalAdvance(header_text) + 30
-
-            max_content_width = 0
-            sample_rows = min(80, self.table_widget.rowCount())
-            for r in range(sample_rows):
-                item = self.table_widget.item(r, c)
-                if item and item.text():
-                    text = item.text()
-                    text_width = fm.horizontalAdvance(text) + 30
-                    max_content_width = max(max_content_width, text_width)
-
-            optimal_width = max(header_width, max_content_width)
-            MIN_WIDTH = 110
-            MAX_WIDTH = 420
-
-            if any(
-                kw in header_text.lower()
-                for kw in ["desc", "note", "comment", "remark", "描述", "备注", "说明"]
-            ):
-                MAX_WIDTH = 600
-
-            if any(kw in header_text.lower() for kw in ["id", "code", "代码", "编号"]):
-                MIN_WIDTH = 90
-                MAX_WIDTH = 220
-
-            final_width = max(MIN_WIDTH, min(optimal_width, MAX_WIDTH))
-            self.table_widget.setColumnWidth(c, int(final_width))
-
-        total_width = sum(
-            self.table_widget.columnWidth(c) for c in range(self.table_widget.columnCount())
-        )
-        available_width = self.table_widget.viewport().width()
-
-        if total_width < available_width and self.table_widget.columnCount() > 0:
-            extra_space = available_width - total_width
-            cols_to_expand = min(3, self.table_widget.columnCount())
-            extra_per_col = extra_space // cols_to_expand
-
+    def _show_rows(self, desc, rows, more=None):
+        self.columns = [d[0] for d in desc]
+        types = [str(d[1]) for d in desc]
+        # 行元组一次性转置成列（纯 Python 列式，不依赖 pyarrow/numpy，slim 打包不含它们）
+        if more is None:
+            values = list(zip(*rows)) if rows else [() for _ in self.columns]
+        else:
+            values = [list(col) for col in zip(*rows)]
+        self.display_data(self.columns, types, values, more)
+
+    def display_data(self, columns, types, values, more=None):
+        """整页数据交给模型（一次重置），视图只为可见单元格取数据"""
+        self.model.set_page(columns, types, values, more)
+        # 表头点击排序后翻页仍是同一排序，箭头跟着保留
+        sorted_index = columns.index(self.sort_column) if self.sort_column in columns else None
+        self._update_header_sort_icons(sorted_index=sorted_index)
+
+        # 列名与行数都没变（如同一查询翻页）时沿用当前列宽（模型重置不影响列宽，用户拖动过的也保留）
+        width_key = (tuple(columns), self.model.rowCount())
+        if width_key != self._width_key:
+            self._width_key = width_key
+            self._unsized = set(range(len(columns)))
+            self._size_visible_columns()
+
+    def _size_visible_columns(self):
+        """
+        只为滚动到可见区域的列测量列宽：几百列的宽表打开时只测首屏几列，
+        其余列保持默认宽度，横向滚动或视图变宽时再补测
+        """
+        if not self._unsized:
+            return
+        header = self.table_widget.horizontalHeader()
+        fm = QFontMetrics(self.table_widget.font())
+        header_fm = QFontMetrics(header.font())
+        available = self.table_widget.viewport().width()
+
+        ncols = self.model.columnCount()
+        c = max(0, header.logicalIndexAt(0))
+        x, right = header.sectionPosition(c), header.offset() + available
+        widths = {}
+        while c < ncols and x < right:
+            if c in self._unsized:
+                widths[c] = self._measure_column_width(c, fm, header_fm)
+            x += widths.get(c, header.sectionSize(c))
+            c += 1
+        self._unsized.difference_update(widths)
+
+        # 整表放得下时把剩余空间分给最后几列
+        if len(widths) == ncols and x < available and ncols > 0:
+            cols_to_expand = min(3, ncols)
+            extra_per_col = (available - x) // cols_to_expand
             for i in range(cols_to_expand):
-                c = self.table_widget.columnCount() - 1 - i
-                current_width = self.table_widget.columnWidth(c)
-                new_width = min(current_width + extra_per_col, 600)
-                self.table_widget.setColumnWidth(c, new_width)
+                c = ncols - 1 - i
+                widths[c] = min(widths[c] + extra_per_col, 600)
+
+        # 设置列宽期间表头固定尺寸，全部设好后再恢复可拖动
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        for c, w in widths.items():
+            header.resizeSection(c, w)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+
+    def _measure_column_width(self, c: int, fm: QFontMetrics, header_fm: QFontMetrics) -> int:
+        """
+        按表头和前 20 行估算列宽：先用 len() 在 Python 里挑出最长的文本，
+        每列只调用一次 horizontalAdvance
+        """
+        header_text = self.model.headerData(c, Qt.Orientation.Horizontal)
+        header_width = header_fm.horizontalAdvance(header_text) + 30
+
+        sample_rows = range(min(20, self.model.rowCount()))
+        longest = max((self.model.text(r, c) for r in sample_rows), key=len, default="")
+        max_content_width = fm.horizontalAdvance(longest) + 30 if longest else 0
+
+        optimal_width = max(header_width, max_content_width)
+        MIN_WIDTH = 110
+        MAX_WIDTH = 420
+
+        if any(
+            kw in header_text.lower()
+            for kw in ["desc", "note", "comment", "remark", "描述", "备注", "说明"]
+        ):
+            MAX_WIDTH = 600
+
+        if any(kw in header_text.lower() for kw in ["id", "code", "代码", "编号"]):
+            MIN_WIDTH = 90
+            MAX_WIDTH = 220
+
+        return int(max(MIN_WIDTH, min(optimal_width, MAX_WIDTH)))
 
     # ------------------------------------------------------------------
     # 列头排序 + 小三角
     # ------------------------------------------------------------------
 
     def _update_header_sort_icons(self, sorted_index: int | None):
-        if self.table_widget.columnCount() == 0:
-            return
-
-        if not self.base_header_labels or len(self.base_header_labels) != self.table_widget.columnCount():
-            self.base_header_labels = []
-            for i in range(self.table_widget.columnCount()):
-                item = self.table_widget.horizontalHeaderItem(i)
-                self.base_header_labels.append(item.text() if item else f"col_{i}")
-
-        for i in range(self.table_widget.columnCount()):
-            item = self.table_widget.horizontalHeaderItem(i)
-            if not item:
-                continue
-            base = self.base_header_labels[i] if i < len(self.base_header_labels) else item.text()
-
-            if sorted_index is not None and i == sorted_index and self.sort_column is not None:
-                arrow = "▲" if self.sort_order == Qt.SortOrder.AscendingOrder else "▼"
-                item.setText(f"{base} {arrow}")
-            else:
-                item.setText(base)
+        if sorted_index is None or self.sort_column is None:
+            self.model.set_sort_indicator(None)
+        else:
+            self.model.set_sort_indicator(
+                sorted_index, self.sort_order == Qt.SortOrder.AscendingOrder
+            )
 
     def on_header_clicked(self, logical_index: int):
         if not self.con or not self.columns:
@@ -712,38 +1306,33 @@ class ParquetTab(QWidget):
         order_dir = "ASC" if self.sort_order == Qt.SortOrder.AscendingOrder else "DESC"
         escaped_col = col_name.replace('"', '""')
 
-        raw_sql = self.sql_input.text().strip()
+        raw_sql = self.sql_input.text().strip().rstrip(";")
         if not raw_sql:
             raw_sql = "SELECT * FROM t LIMIT 100"
-        upper = raw_sql.upper()
-
-        limit_clause = ""
-        limit_pos = upper.rfind(" LIMIT ")
-        if limit_pos != -1:
-            limit_clause = raw_sql[limit_pos:].strip()
-            base_sql = raw_sql[:limit_pos].strip()
-        else:
-            base_sql = raw_sql
-            limit_clause = f"LIMIT {self.page_size}"
-
-        upper_base = base_sql.upper()
-        order_pos = upper_base.rfind(" ORDER BY ")
-        if order_pos != -1:
-            base_sql = base_sql[:order_pos].strip()
+        page_size = self.page_size
+        m = _LIMIT_RE.search(raw_sql)
+        if m:
+            page_size = max(1, int(m.group(1)))
+            raw_sql = raw_sql[:m.start()]
+        base_sql = _strip_order_by(raw_sql)
 
-        if " FROM " not in upper_base:
+        if " FROM " not in base_sql.upper():
             base_sql = "SELECT * FROM t"
 
-        sort_sql = f'{base_sql} ORDER BY "{escaped_col}" {order_dir} {limit_clause}'.strip()
+        # 排序后的查询作为基础查询，翻页走同一条 _PAGE_SQL；DuckDB 对子查询里的
+        # ORDER BY + 外层 LIMIT/OFFSET 使用 TOP_N，每页都不做全量排序
+        sort_sql = f'{base_sql} ORDER BY "{escaped_col}" {order_dir}'
 
         try:
-            self.run_sql_to_table(sort_sql)
-            self.sql_input.setText(sort_sql)
-            arrow = "▲" if self.sort_order == Qt.SortOrder.AscendingOrder else "▼"
-            self.status_label.setText(
-                f"状态: 按 {col_name} {arrow} 排序，当前页 {self.table_widget.rowCount()} 行"
-            )
+            self._set_base_sql(sort_sql)
+            self.page_size = page_size
+            self.current_page = 1
+            if self.page_size_input:
+                self.page_size_input.setText(str(self.page_size))
+            self._recount_total_rows()
+            self.sql_input.setText(f"{sort_sql} LIMIT {self.page_size}")
             self._update_header_sort_icons(sorted_index=logical_index)
+            self._schedule_refresh()
         except Exception as e:
             QMessageBox.warning(self, "排序错误", f"排序失败:\n{e}")
 
@@ -752,7 +1341,7 @@ class ParquetTab(QWidget):
     # ------------------------------------------------------------------
 
     def export_current_page_csv(self):
-        if self.table_widget.columnCount() == 0:
+        if self.model.columnCount() == 0:
             QMessageBox.information(self, "提示", "没有数据可导出。")
             return
 
@@ -767,35 +1356,19 @@ class ParquetTab(QWidget):
             return
 
         try:
-            cols = [
-                self.table_widget.horizontalHeaderItem(i).text().replace(" ▲", "").replace(" ▼", "")
-                for i in range(self.table_widget.columnCount())
-            ]
-            data = []
-            for r in range(self.table_widget.rowCount()):
-                row = []
-                for c in range(self.table_widget.columnCount()):
-                    it = self.table_widget.item(r, c)
-                    s = it.text() if it else ""
-                    row.append(s)
-                data.append(row)
-
-            self._ensure_con()
-            self.con.execute("DROP TABLE IF EXISTS __tmp_csv__;")
-            cols_ddl = ", ".join(f'"{name}" VARCHAR' for name in cols)
-            self.con.execute(f"CREATE TABLE __tmp_csv__ ({cols_ddl});")
-            if data:
-                placeholders = ", ".join(["?"] * len(cols))
-                self.con.executemany(
-                    f"INSERT INTO __tmp_csv__ VALUES ({placeholders})", data
+            # 当前页在内存中（含未保存的编辑），取齐剩余行后直接用 csv 模块一次写出，不经过 DuckDB
+            self.model.fetch_all()
+            cols = self.model.columns()
+            n_rows = self.model.rowCount()
+            text = self.model.text
+            with open(file_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(cols)
+                writer.writerows(
+                    [text(r, c) for c in range(len(cols))] for r in range(n_rows)
                 )
-
-            norm_path = file_path.replace("\\", "/")
-            self.con.execute(
-                f"COPY __tmp_csv__ TO '{norm_path}' (HEADER, DELIMITER ',');"
-            )
             QMessageBox.information(
-                self, "成功", f"当前页数据已导出！\n共 {len(data)} 行"
+                self, "成功", f"当前页数据已导出！\n共 {n_rows} 行"
             )
             self.status_label.setText(
                 f"状态: 已导出当前页到 {os.path.basename(file_path)}"
@@ -807,6 +1380,9 @@ class ParquetTab(QWidget):
         if not self.con or not self.file_path:
             QMessageBox.information(self, "提示", "没有加载文件，无法导出全部数据。")
             return
+        if self._export_worker is not None:
+            QMessageBox.information(self, "提示", "正在导出全部数据，请稍候。")
+            return
 
         default_dir = os.path.dirname(self.file_path)
         default_name = os.path.splitext(os.path.basename(self.file_path))[0] + "_all.csv"
@@ -818,53 +1394,58 @@ class ParquetTab(QWidget):
         if not file_path:
             return
 
-        try:
-            total_rows = self.con.execute("SELECT COUNT(*) FROM t").fetchone()[0]
-            norm_path = file_path.replace("\\", "/")
-            self.con.execute(
-                f"COPY t TO '{norm_path}' (HEADER, DELIMITER ',');"
-            )
-            QMessageBox.information(
-                self, "成功", f"全部数据已导出！\n共 {total_rows} 行"
-            )
-            self.status_label.setText(
-                f"状态: 已导出全部数据到 {os.path.basename(file_path)}"
-            )
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"导出失败:\n{e}")
+        def export(cur):
+            total = cur.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+            cur.execute("COPY t TO ? (HEADER, DELIMITER ',');", (file_path,))
+            return total
+
+        # 在线程池中执行，导出大文件时界面保持响应
+        self._export_worker = SqlWorker(self._cursor(), export)
+        self._export_worker.signals.done.connect(
+            lambda total: self._on_export_all_done(file_path, total)
+        )
+        self._export_worker.signals.failed.connect(self._on_export_all_failed)
+        self.status_label.setText("状态: 正在导出全部数据...")
+        QThreadPool.globalInstance().start(self._export_worker)
+
+    def _on_export_all_done(self, file_path: str, total_rows: int):
+        self._export_worker = None
+        QMessageBox.information(
+            self, "成功", f"全部数据已导出！\n共 {total_rows} 行"
+        )
+        self.status_label.setText(
+            f"状态: 已导出全部数据到 {os.path.basename(file_path)}"
+        )
+
+    def _on_export_all_failed(self, msg: str):
+        self._export_worker = None
+        self.status_label.setText("状态: 导出失败")
+        QMessageBox.critical(self, "错误", f"导出失败:\n{msg}")
 
     # ------------------------------------------------------------------
     # 表格编辑 & 保存
     # ------------------------------------------------------------------
 
     def add_row(self):
-        cols = self.table_widget.columnCount()
-        if cols == 0:
+        if self.model.columnCount() == 0:
             QMessageBox.information(self, "提示", "当前没有列，无法新增行。")
             return
-        r = self.table_widget.rowCount()
-        self.table_widget.insertRow(r)
-        for c in range(cols):
-            it = QTableWidgetItem("")
-            it.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            it.setBackground(QColor(255, 255, 255))
-            self.table_widget.setItem(r, c, it)
-        self.table_widget.scrollToItem(
-            self.table_widget.item(r, 0),
-            QTableWidget.ScrollHint.PositionAtBottom,
-        )
+        self.model.fetch_all()   # 新增行排在本页全部行之后
+        r = self.model.rowCount()
+        self.model.insertRow(r)
+        index = self.model.index(r, 0)
+        self.table_widget.scrollTo(index, QTableView.ScrollHint.PositionAtBottom)
         self.table_widget.selectRow(r)
-        self.table_widget.setCurrentCell(r, 0)
-        self.table_widget.resizeRowToContents(r)
+        self.table_widget.setCurrentIndex(index)
         self.status_label.setText(f"状态: 已添加新行 (第 {r + 1} 行)")
 
     def delete_selected(self):
-        rows = sorted({it.row() for it in self.table_widget.selectedItems()}, reverse=True)
+        # 整行选择模式下每行只取一个索引，不必遍历 行数×列数 个单元格索引
+        rows = {idx.row() for idx in self.table_widget.selectionModel().selectedRows()}
         if not rows:
             QMessageBox.information(self, "提示", "请先选择要删除的行")
             return
-        for r in rows:
-            self.table_widget.removeRow(r)
+        self.model.remove_rows(rows)
         self.status_label.setText(f"状态: 已删除 {len(rows)} 行")
 
     def reset_view(self):
@@ -873,7 +1454,7 @@ class ParquetTab(QWidget):
         try:
             self.sort_column = None
             self.sort_order = Qt.SortOrder.AscendingOrder
-            self.base_sql = "SELECT * FROM t"
+            self._set_base_sql("SELECT * FROM t")
             self.page_size = 100
             self.current_page = 1
             if self.page_size_input:
@@ -905,21 +1486,159 @@ class ParquetTab(QWidget):
         if not file_path:
             return
 
-        try:
-            norm_path = file_path.replace("\\", "/")
-            self.con.execute(
-                f"COPY (SELECT * FROM t) TO '{norm_path}' (FORMAT PARQUET);"
+        def save(cur):
+            cur.execute(
+                "COPY t TO ? (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 122880);",
+                (file_path,),
             )
-            QMessageBox.information(self, "成功", "文件保存成功！")
-            self.status_label.setText(f"状态: 已保存到 {os.path.basename(file_path)}")
-            self.file_path = file_path
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"保存失败:\n{e}")
+
+        # 在线程池中写文件，界面保持响应；写完之前禁用保存按钮，避免并发 COPY
+        self._save_worker = SqlWorker(self._cursor(), save)
+        self._save_worker.signals.done.connect(lambda _: self._on_saved(file_path))
+        self._save_worker.signals.failed.connect(self._on_save_failed)
+        self.save_btn.setEnabled(False)
+        self.status_label.setText("状态: 正在保存...")
+        QThreadPool.globalInstance().start(self._save_worker)
+
+    def _on_saved(self, file_path: str):
+        self._save_worker = None
+        self.save_btn.setEnabled(True)
+        QMessageBox.information(self, "成功", "文件保存成功！")
+        self.status_label.setText(f"状态: 已保存到 {os.path.basename(file_path)}")
+        self.file_path = os.path.abspath(file_path)
+
+    def _on_save_failed(self, msg: str):
+        self._save_worker = None
+        self.save_btn.setEnabled(True)
+        self.status_label.setText("状态: 保存失败")
+        QMessageBox.critical(self, "错误", f"保存失败:\n{msg}")
 
 # =====================================================================
 # 主窗口
 # =====================================================================
 
+# 主窗口样式表：设置在 QApplication 上，整个程序只解析一次
+_QSS = """
+QMainWindow {
+    background-color: #f9fafb;
+}
+QWidget#mainToolbar {
+    background-color: #ffffff;
+    border-bottom: 1px solid #e5e7eb;
+}
+QWidget#leftPanel {
+    background-color: #f3f4f6;
+    border-right: 1px solid #e5e7eb;
+}
+QWidget#titleWidget {
+    background-color: #ffffff;
+    border-bottom: 1px solid #e5e7eb;
+}
+QWidget#infoCard {
+    background-color: #f9fafb;
+    border: 1px solid #e5e7eb;
+    border-radius: 6px;
+}
+QWidget#toolbar {
+    background-color: #ffffff;
+    border-bottom: 1px solid #e5e7eb;
+}
+QWidget#contentWidget {
+    background-color: #ffffff;
+}
+QLineEdit {
+    background-color: #ffffff;
+    border: 1px solid #d1d5db;
+    border-radius: 6px;
+    padding: 8px 12px;
+    color: #111827;
+}
+QLineEdit:focus {
+    border: 2px solid #3b82f6;
+    padding: 7px 11px;
+}
+QTableView {
+    background-color: #ffffff;
+    border: 1px solid #e5e7eb;
+    border-radius: 8px;
+    gridline-color: #f3f4f6;
+}
+QTableView::item:selected {
+    background-color: #dbeafe;
+    color: #1e40af;
+}
+QHeaderView::section {
+    background-color: #f9fafb;
+    color: #374151;
+    padding: 8px;
+    border: none;
+    border-bottom: 2px solid #e5e7eb;
+    border-right: 1px solid #e5e7eb;
+    font-weight: 600;
+}
+QHeaderView::section:hover {
+    background-color: #f3f4f6;
+}
+QHeaderView::up-arrow, QHeaderView::down-arrow {
+    width: 0px;
+    height: 0px;
+}
+QTreeWidget {
+    background-color: #ffffff;
+    border: none;
+}
+QTreeWidget::item:selected {
+    background-color: #dbeafe;
+    color: #1e40af;
+}
+QTreeWidget::item:hover {
+    background-color: #f3f4f6;
+}
+QTabWidget::pane {
+    border: none;
+    background-color: #ffffff;
+}
+QTabBar::tab {
+    background-color: #f3f4f6;
+    color: #6b7280;
+    padding: 10px 20px;
+    margin-right: 2px;
+    border-top-left-radius: 6px;
+    border-top-right-radius: 6px;
+}
+QTabBar::tab:selected {
+    background-color: #ffffff;
+    color: #111827;
+    font-weight: 600;
+}
+QTabBar::tab:hover {
+    background-color: #e5e7eb;
+}
+QMenu {
+    background-color: #ffffff;
+    border: 1px solid #e5e7eb;
+    border-radius: 6px;
+    padding: 5px;
+}
+QMenu::item {
+    padding: 8px 20px;
+    border-radius: 4px;
+}
+QMenu::item:selected {
+    background-color: #f3f4f6;
+}
+QLineEdit#cellEditor {
+    background: #ffffff;
+    color: #111827;
+    border: 2px solid #2563eb;
+    border-radius: 6px;
+    padding: 4px 6px;
+    selection-background-color: #2563eb;
+    selection-color: #ffffff;
+}
+"""
+
+
 class ParquetViewer(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -927,6 +1646,12 @@ class ParquetViewer(QMainWindow):
         self.recent_files: list[str] = []
         self.load_settings()
 
+        # 最近文件变化后延迟 1 秒写入设置（Windows 上是注册表），连续打开多个文件只写一次
+        self._settings_timer = QTimer(self)
+        self._settings_timer.setSingleShot(True)
+        self._settings_timer.setInterval(1000)
+        self._settings_timer.timeout.connect(self.save_settings)
+
         self.tab_widget: QTabWidget | None = None
         self.recent_menu: QMenu | None = None
 
@@ -954,7 +1679,7 @@ class ParquetViewer(QMainWindow):
         self.move(geo.topLeft())
 
     def init_ui(self):
-        base_font = get_base_font()
+        fonts = tab_fonts()
 
         self.setWindowTitle("Parquet 文件查看器 (DuckDB) - 增强版")
         self.setGeometry(100, 100, 1400, 840)
@@ -974,21 +1699,23 @@ class ParquetViewer(QMainWindow):
         big_btn_style = "padding: 8px 20px; font-size: 11pt; font-weight: 600; border-radius: 6px;"
 
         open_btn = QPushButton("📂 打开文件")
-        open_btn.setFont(QFont(base_font.family(), base_font.pointSize() + 1))
+        open_btn.setFont(fonts.large)
         open_btn.setStyleSheet(big_btn_style + "background-color: #3b82f6; color: white; border: none;")
         open_btn.clicked.connect(self.open_file)
         toolbar_layout.addWidget(open_btn)
 
         recent_btn = QPushButton("🕘 最近打开")
-        recent_btn.setFont(QFont(base_font.family(), base_font.pointSize()))
+        recent_btn.setFont(fonts.normal)
         recent_btn.setStyleSheet(big_btn_style + "background-color: #6b7280; color: white; border: none;")
         self.recent_menu = QMenu(self)
+        # 菜单内容在每次弹出前才生成；所有条目共用一个 triggered 处理函数
+        self.recent_menu.aboutToShow.connect(self.refresh_recent_menu)
+        self.recent_menu.triggered.connect(self._open_recent_action)
         recent_btn.setMenu(self.recent_menu)
         toolbar_layout.addWidget(recent_btn)
-        self.refresh_recent_menu()
 
         new_tab_btn = QPushButton("➕ 新建标签")
-        new_tab_btn.setFont(QFont(base_font.family(), base_font.pointSize()))
+        new_tab_btn.setFont(fonts.normal)
         new_tab_btn.setStyleSheet(big_btn_style + "background-color: #10b981; color: white; border: none;")
         new_tab_btn.clicked.connect(self.new_tab)
         toolbar_layout.addWidget(new_tab_btn)
@@ -996,7 +1723,7 @@ class ParquetViewer(QMainWindow):
         toolbar_layout.addStretch()
 
         close_tab_btn = QPushButton("✖ 关闭当前标签")
-        close_tab_btn.setFont(QFont(base_font.family(), base_font.pointSize()))
+        close_tab_btn.setFont(fonts.normal)
         close_tab_btn.setStyleSheet(big_btn_style + "background-color: #ef4444; color: white; border: none;")
         close_tab_btn.clicked.connect(self.close_current_tab)
         toolbar_layout.addWidget(close_tab_btn)
@@ -1013,116 +1740,10 @@ class ParquetViewer(QMainWindow):
         # 是否创建默认标签由 main() 里的 QTimer 决定
 
     def apply_stylesheet(self):
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #f9fafb;
-            }
-            QWidget#mainToolbar {
-                background-color: #ffffff;
-                border-bottom: 1px solid #e5e7eb;
-            }
-            QWidget#leftPanel {
-                background-color: #f3f4f6;
-                border-right: 1px solid #e5e7eb;
-            }
-            QWidget#titleWidget {
-                background-color: #ffffff;
-                border-bottom: 1px solid #e5e7eb;
-            }
-            QWidget#infoCard {
-                background-color: #f9fafb;
-                border: 1px solid #e5e7eb;
-                border-radius: 6px;
-            }
-            QWidget#toolbar {
-                background-color: #ffffff;
-                border-bottom: 1px solid #e5e7eb;
-            }
-            QWidget#contentWidget {
-                background-color: #ffffff;
-            }
-            QLineEdit {
-                background-color: #ffffff;
-                border: 1px solid #d1d5db;
-                border-radius: 6px;
-                padding: 8px 12px;
-                color: #111827;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-                padding: 7px 11px;
-            }
-            QTableWidget {
-                background-color: #ffffff;
-                border: 1px solid #e5e7eb;
-                border-radius: 8px;
-                gridline-color: #f3f4f6;
-            }
-            QTableWidget::item:selected {
-                background-color: #dbeafe;
-                color: #1e40af;
-            }
-            QHeaderView::section {
-                background-color: #f9fafb;
-                color: #374151;
-                padding: 8px;
-                border: none;
-                border-bottom: 2px solid #e5e7eb;
-                border-right: 1px solid #e5e7eb;
-                font-weight: 600;
-            }
-            QHeaderView::section:hover {
-                background-color: #f3f4f6;
-            }
-            QHeaderView::up-arrow, QHeaderView::down-arrow {
-                width: 0px;
-                height: 0px;
-            }
-            QTreeWidget {
-                background-color: #ffffff;
-                border: none;
-            }
-            QTreeWidget::item:selected {
-                background-color: #dbeafe;
-                color: #1e40af;
-            }
-            QTreeWidget::item:hover {
-                background-color: #f3f4f6;
-            }
-            QTabWidget::pane {
-                border: none;
-                background-color: #ffffff;
-            }
-            QTabBar::tab {
-                background-color: #f3f4f6;
-                color: #6b7280;
-                padding: 10px 20px;
-                margin-right: 2px;
-                border-top-left-radius: 6px;
-                border-top-right-radius: 6px;
-            }
-            QTabBar::tab:selected {
-                background-color: #ffffff;
-                color: #111827;
-                font-weight: 600;
-            }
-            QTabBar::tab:hover {
-                background-color: #e5e7eb;
-            }
-            QMenu {
-                background-color: #ffffff;
-                border: 1px solid #e5e7eb;
-                border-radius: 6px;
-                padding: 5px;
-            }
-            QMenu::item {
-                padding: 8px 20px;
-                border-radius: 4px;
-            }
-            QMenu::item:selected {
-                background-color: #f3f4f6;
-            }
-        """)
+        """样式表设在 QApplication 上：只解析一次，新建标签 / 窗口不再重新套用"""
+        app = QApplication.instance()
+        if app.styleSheet() != _QSS:
+            app.setStyleSheet(_QSS)
 
     # 最近文件
     def load_settings(self):
@@ -1136,12 +1757,20 @@ class ParquetViewer(QMainWindow):
 
     def add_recent_file(self, file_path: str):
         file_path = os.path.abspath(file_path)
+        if self.recent_files and self.recent_files[0] == file_path:
+            return   # 顺序没变，不必写设置
         if file_path in self.recent_files:
             self.recent_files.remove(file_path)
         self.recent_files.insert(0, file_path)
         self.recent_files = self.recent_files[:10]
-        self.save_settings()
-        self.refresh_recent_menu()
+        self._settings_timer.start()
+
+    def closeEvent(self, event):
+        if self._settings_timer.isActive():
+            self._settings_timer.stop()
+            self.save_settings()
+        self.settings.sync()
+        super().closeEvent(event)
 
     def refresh_recent_menu(self):
         if not self.recent_menu:
@@ -1152,8 +1781,12 @@ class ParquetViewer(QMainWindow):
             act.setEnabled(False)
             return
         for path in self.recent_files:
-            act = self.recent_menu.addAction(path)
-            act.triggered.connect(lambda _, p=path: self.open_file_in_new_tab(p))
+            self.recent_menu.addAction(path).setData(path)
+
+    def _open_recent_action(self, action):
+        path = action.data()
+        if path:
+            self.open_file_in_new_tab(path)
 
     # 标签页管理
     def new_tab(self):
@@ -1178,8 +1811,8 @@ class ParquetViewer(QMainWindow):
         for i in range(self.tab_widget.count()):
             widget = self.tab_widget.widget(i)
             if isinstance(widget, ParquetTab):
-                opened_path = getattr(widget, "file_path", None)
-                if opened_path and os.path.abspath(opened_path) == abs_path:
+                # 标签里的 file_path 加载时已是绝对路径，直接比较
+                if widget.file_path == abs_path:
                     self.tab_widget.setCurrentIndex(i)
                     return
 
@@ -1191,12 +1824,19 @@ class ParquetViewer(QMainWindow):
 
     def close_tab(self, index: int):
         if self.tab_widget.count() > 1:
+            widget = self.tab_widget.widget(index)
+            if isinstance(widget, ParquetTab) and widget.is_busy():
+                QMessageBox.information(self, "提示", "该标签正在保存或导出，请完成后再关闭。")
+                return
             self.tab_widget.removeTab(index)
+            if isinstance(widget, ParquetTab):
+                widget.close_connection()
+            widget.deleteLater()
 
     def close_current_tab(self):
         idx = self.tab_widget.currentIndex()
-        if idx >= 0 and self.tab_widget.count() > 1:
-            self.tab_widget.removeTab(idx)
+        if idx >= 0:
+            self.close_tab(idx)
 
     # 拖拽打开
     def dragEnterEvent(self, event: QDragEnterEvent):